@@ -0,0 +1,470 @@
+"""Load benchmark for the API against synthetic data.
+
+Seeds companies, news, trends and market sizing at a chosen scale. The store is
+mongomock-motor in process by default, or a local mongod with --mongo-url. The
+app runs in process with a latency-simulating LLM fake. Every api_router
+endpoint is driven with concurrent httpx requests. Latency percentiles and
+throughput are reported per endpoint and optionally compared with a stored
+baseline:
+
+    python bench.py --companies 1000 --news 20000 --save-baseline bench_baseline.json
+    python bench.py --companies 1000 --news 20000 --baseline bench_baseline.json
+
+The exit status is 1 when a comparison finds a regression. The load generator
+shares the event loop with the app, so compare numbers only between runs on
+the same machine with the same settings.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+logger = logging.getLogger("bench")
+
+CATEGORIES = ["Innovation", "Risk", "Talent", "Finance", "Customer focus"]
+IMPACTS = ["High", "Medium", "Low"]
+TECHNOLOGIES = ["Artificial Intelligence", "Cloud Computing", "Cybersecurity", "Analytics & Big Data", "IoT",
+                "Blockchain", "Quantum Computing", "Edge Computing"]
+SEGMENTS = ["AI Consulting", "Cloud Services", "Digital Transformation", "Cybersecurity Consulting",
+            "Data Engineering", "Managed Services"]
+REGIONS = ["Global", "North America", "Europe", "APAC", "LATAM"]
+INDUSTRIES = ["All Industries", "Technology", "Financial Services", "Healthcare", "Retail", "Energy"]
+SERVICES = ["Digital Transformation", "Cloud Migration", "Risk Advisory", "AI/ML Solutions", "Cybersecurity",
+            "Data & AI", "Strategy", "Operations", "Managed Services", "Enterprise Applications"]
+CLIENTS = ["Fortune 500", "Government", "Healthcare", "Financial Services", "Retail", "Banking", "Telecom",
+           "Energy", "Manufacturing", "Public Sector"]
+HEADLINE_VERBS = ["Launches", "Expands", "Acquires", "Announces", "Partners on", "Invests in", "Wins",
+                  "Restructures", "Delays", "Reports"]
+HEADLINE_TOPICS = ["AI Platform", "Cloud Practice", "Security Firm", "Quantum Lab", "Analytics Suite",
+                   "Healthcare Contract", "Banking Deal", "Talent Program", "Sustainability Unit", "Edge Offering"]
+SEARCH_TERMS = ["ai", "cloud", "security", "quantum", "analytics", "healthcare", "banking", "talent"]
+SEED_CHUNK_SIZE = 10000
+
+
+# Synthetic data
+def company_name(i: int) -> str:
+    return f"Company {i:07d}"
+
+
+def make_company(rng: random.Random, i: int) -> Dict[str, Any]:
+    consulting = round(rng.uniform(20, 80), 1)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "name": company_name(i),
+        "revenue": round(rng.lognormvariate(2.0, 1.0), 2),
+        "yoy_growth": round(rng.gauss(8, 6), 1),
+        "consulting_mix": consulting,
+        "tech_services_mix": round(100 - consulting, 1),
+        "global_presence": rng.randint(1, 150),
+        "key_services": rng.sample(SERVICES, 4),
+        "major_clients": rng.sample(CLIENTS, 4),
+        "ai_adoption": round(rng.uniform(1, 10), 1),
+        "cloud_adoption": round(rng.uniform(1, 10), 1),
+        "cybersecurity_adoption": round(rng.uniform(1, 10), 1),
+        "analytics_adoption": round(rng.uniform(1, 10), 1),
+        "innovation_score": round(rng.uniform(1, 10), 1),
+        "execution_score": round(rng.uniform(1, 10), 1),
+        "market_share": round(rng.uniform(0.01, 5), 2),
+    }
+
+
+def make_news(rng: random.Random, companies: int) -> Dict[str, Any]:
+    name = company_name(rng.randrange(companies))
+    topic = rng.choice(HEADLINE_TOPICS)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "company_name": name,
+        # A random suffix keeps (title, date) unique, which the ingest upsert key relies on
+        "title": f"{name} {rng.choice(HEADLINE_VERBS)} {topic} #{rng.getrandbits(32):08x}",
+        "description": f"{name} {topic.lower()} update for {rng.choice(CLIENTS).lower()} clients",
+        "category": rng.choice(CATEGORIES),
+        "date": f"{rng.randint(2022, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "impact": rng.choice(IMPACTS),
+    }
+
+
+def make_trends(rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "technology": technology,
+            "adoption_rate": round(rng.uniform(10, 95), 1),
+            "growth_rate": round(rng.uniform(2, 70), 1),
+            "market_size": round(rng.uniform(10, 900), 1),
+            "year": year,
+        }
+        for technology in TECHNOLOGIES for year in range(2018, 2026)
+    ]
+
+
+def make_market_sizing(rng: random.Random) -> List[Dict[str, Any]]:
+    docs = []
+    for segment in SEGMENTS:
+        for region in REGIONS:
+            for industry in INDUSTRIES:
+                tam = round(rng.uniform(50, 1500), 1)
+                sam = round(tam * rng.uniform(0.2, 0.6), 1)
+                docs.append({
+                    "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "segment": segment,
+                    "tam": tam,
+                    "sam": sam,
+                    "som": round(sam * rng.uniform(0.1, 0.4), 1),
+                    "region": region,
+                    "industry": industry,
+                    "growth_projection": round(rng.uniform(2, 35), 1),
+                })
+    return docs
+
+
+def make_metric_points(rng: random.Random, name: str) -> List[Dict[str, Any]]:
+    revenue = rng.lognormvariate(0.5, 1.0)
+    points = []
+    for year in range(2021, 2026):
+        for quarter in range(1, 5):
+            revenue *= 1 + rng.gauss(0.02, 0.03)
+            points.append({
+                "company_name": name, "year": year, "quarter": quarter, "revenue": round(revenue, 3),
+                "yoy_growth": round(rng.gauss(8, 5), 1), "market_share": round(rng.uniform(0.01, 5), 2),
+            })
+    return points
+
+
+def make_trend_points(rng: random.Random, technology: str) -> List[Dict[str, Any]]:
+    return [
+        {"technology": technology, "year": year, "adoption_rate": round(rng.uniform(10, 95), 1),
+         "growth_rate": round(rng.uniform(2, 70), 1), "market_size": round(rng.uniform(10, 900), 1)}
+        for year in range(2015, 2026)
+    ]
+
+
+async def seed(db, rng: random.Random, companies: int, news: int):
+    started = time.perf_counter()
+    for start in range(0, companies, SEED_CHUNK_SIZE):
+        await db.companies.insert_many([make_company(rng, i) for i in range(start, min(companies, start + SEED_CHUNK_SIZE))])
+    for start in range(0, news, SEED_CHUNK_SIZE):
+        await db.news.insert_many([make_news(rng, companies) for _ in range(min(SEED_CHUNK_SIZE, news - start))])
+    await db.trends.insert_many(make_trends(rng))
+    await db.market_sizing.insert_many(make_market_sizing(rng))
+    logger.info(f"Seeded {companies} companies and {news} news in {time.perf_counter() - started:.1f}s")
+
+
+# LLM stand-in
+class FakeLlmChat:
+    """Drop-in for LlmChat that sleeps for a log-normal latency and returns a well-formed SWOT."""
+
+    latency_seconds = 0.8
+    jitter = 0.3
+    failure_rate = 0.0
+    rng = random.Random(0)
+
+    def __init__(self, api_key: str, session_id: str, system_message: str):
+        self.session_id = session_id
+
+    def with_model(self, provider: str, model: str) -> "FakeLlmChat":
+        return self
+
+    async def send_message(self, message) -> str:
+        await asyncio.sleep(self.latency_seconds * self.rng.lognormvariate(0, self.jitter))
+        if self.rng.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure")
+        quadrants = {
+            name: [f"{name.title()} point {i + 1} for {self.session_id}" for i in range(4)]
+            for name in ("strengths", "weaknesses", "opportunities", "threats")
+        }
+        return "```json\n" + json.dumps(quadrants, indent=2) + "\n```"
+
+
+# Scenarios: one per api_router route (plus variants), each building a request from the rng
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str
+    build: Callable[[random.Random], Dict[str, Any]]
+    expected: tuple = (200,)
+    writes: bool = False
+
+
+def build_scenarios(companies: int) -> List[Scenario]:
+    def any_company(rng: random.Random) -> str:
+        return company_name(rng.randrange(companies))
+
+    def ingest_body(rng: random.Random) -> Dict[str, Any]:
+        lines = [json.dumps(make_news(rng, companies)) for _ in range(50)]
+        return {"content": "\n".join(lines).encode(), "headers": {"Content-Type": "application/x-ndjson"}}
+
+    return [
+        Scenario("root", "GET", "/api/", lambda rng: {}),
+        Scenario("health_db", "GET", "/api/health/db", lambda rng: {}),
+        Scenario("dashboard", "GET", "/api/dashboard", lambda rng: {}),
+        Scenario("companies_page", "GET", "/api/companies", lambda rng: {"params": {"limit": 100}}),
+        Scenario("companies_stream", "GET", "/api/companies",
+                 lambda rng: {"params": {"stream": "true", "fields": "name,revenue,market_share"}}),
+        Scenario("company", "GET", "/api/companies/{company_name}",
+                 lambda rng: {"url": f"/api/companies/{any_company(rng)}"}),
+        Scenario("company_similar", "GET", "/api/companies/{company_name}/similar",
+                 lambda rng: {"url": f"/api/companies/{any_company(rng)}/similar", "params": {"k": 10}}),
+        Scenario("news_search", "GET", "/api/news/search",
+                 lambda rng: {"params": {"q": rng.choice(SEARCH_TERMS), "impact": rng.choice(IMPACTS)}}),
+        Scenario("news_page", "GET", "/api/news", lambda rng: {"params": {"limit": 100}}),
+        Scenario("news_company", "GET", "/api/news", lambda rng: {"params": {"company_name": any_company(rng)}}),
+        Scenario("swot", "POST", "/api/swot", lambda rng: {"json": {"company_name": any_company(rng)}}),
+        Scenario("swot_stream", "GET", "/api/swot/stream", lambda rng: {"params": {"company_name": any_company(rng)}}),
+        Scenario("swot_batch", "POST", "/api/swot/batch",
+                 lambda rng: {"json": {"company_names": [any_company(rng) for _ in range(5)]}}),
+        Scenario("jobs_swot", "POST", "/api/jobs/swot", lambda rng: {"json": {"company_name": any_company(rng)}},
+                 expected=(202,)),
+        # Job ids are not known up front; unknown ids still exercise the id index lookup
+        Scenario("job", "GET", "/api/jobs/{job_id}",
+                 lambda rng: {"url": f"/api/jobs/{uuid.UUID(int=rng.getrandbits(128))}"}, expected=(404,)),
+        Scenario("job_events", "GET", "/api/jobs/{job_id}/events",
+                 lambda rng: {"url": f"/api/jobs/{uuid.UUID(int=rng.getrandbits(128))}/events"}, expected=(404,)),
+        Scenario("trends", "GET", "/api/trends", lambda rng: {}),
+        Scenario("market_sizing", "GET", "/api/market-sizing", lambda rng: {}),
+        Scenario("market_rollups", "GET", "/api/market-sizing/rollups",
+                 lambda rng: {"params": {"region": rng.sample(REGIONS, 2)}}),
+        Scenario("market_projections", "POST", "/api/market-sizing/projections",
+                 lambda rng: {"json": {"years": 10, "group_by": "industry", "scenarios": [
+                     {"name": f"s{i}", "growth_multiplier": round(rng.uniform(0.5, 1.5), 2)} for i in range(10)
+                 ]}}),
+        Scenario("leaderboards", "GET", "/api/leaderboards", lambda rng: {"params": {"n": 10}}),
+        Scenario("positioning", "GET", "/api/positioning", lambda rng: {}),
+        Scenario("timeseries_company", "GET", "/api/timeseries/companies/{company_name}",
+                 lambda rng: {"url": f"/api/timeseries/companies/{company_name(rng.randrange(min(companies, 100)))}",
+                              "params": {"interval": rng.choice(["quarter", "year"])}}),
+        Scenario("timeseries_trends", "GET", "/api/timeseries/trends",
+                 lambda rng: {"params": {"technology": rng.choice(TECHNOLOGIES)}}),
+        Scenario("benchmark_top", "POST", "/api/analytics/benchmark", lambda rng: {"json": {"top": 25}}),
+        Scenario("benchmark_compare", "POST", "/api/analytics/benchmark",
+                 lambda rng: {"json": {"companies": [any_company(rng) for _ in range(20)]}}),
+        # Writes run last so they do not invalidate caches under the read scenarios
+        Scenario("timeseries_company_write", "POST", "/api/timeseries/companies",
+                 lambda rng: {"json": make_metric_points(rng, any_company(rng))}, writes=True),
+        Scenario("timeseries_trends_write", "POST", "/api/timeseries/trends",
+                 lambda rng: {"json": make_trend_points(rng, rng.choice(TECHNOLOGIES))}, writes=True),
+        Scenario("ingest_news", "POST", "/api/ingest/{collection_name}",
+                 lambda rng: {"url": "/api/ingest/news", **ingest_body(rng)}, writes=True),
+    ]
+
+
+def check_coverage(api_router, scenarios: List[Scenario]):
+    covered = {(s.method, s.route) for s in scenarios}
+    for route in api_router.routes:
+        methods = getattr(route, "methods", None)
+        if not methods:
+            logger.info(f"Not benchmarked (not plain HTTP): {route.path}")
+            continue
+        for method in methods - {"HEAD", "OPTIONS"}:
+            if (method, route.path) not in covered:
+                logger.warning(f"No benchmark scenario for {method} {route.path}")
+
+
+# Load generation
+@dataclass
+class Result:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        p50, p95, p99 = np.percentile(self.latencies, [50, 95, 99]) * 1000 if self.latencies else (0.0, 0.0, 0.0)
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "rps": round(len(self.latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+        }
+
+
+async def send(client: httpx.AsyncClient, scenario: Scenario, rng: random.Random) -> int:
+    spec = scenario.build(rng)
+    response = await client.request(
+        scenario.method, spec.get("url", scenario.route), params=spec.get("params"), json=spec.get("json"),
+        content=spec.get("content"), headers=spec.get("headers"),
+    )
+    return response.status_code
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int,
+                       warmup: int, rng: random.Random) -> Result:
+    for _ in range(warmup):
+        await send(client, scenario, rng)
+    result = Result()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = await send(client, scenario, rng)
+            except Exception as e:
+                logger.warning(f"{scenario.name}: {str(e)}")
+                status = None
+            result.latencies.append(time.perf_counter() - started)
+            if status not in scenario.expected:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# Baseline comparison
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            # Sub-millisecond timings are noisy, so a regression needs an absolute change as well
+            if current[key] > previous[key] * (1 + tolerance) and current[key] - previous[key] > min_delta_ms:
+                regressions.append(f"{name}: {key} {previous[key]} -> {current[key]}")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {current['rps']}")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Any]]):
+    header = f"{'scenario':<26}{'reqs':>7}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    if baseline:
+        header += f"{'base p95':>10}{'base rps':>10}"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<26}{r['requests']:>7}{r['errors']:>6}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                f"{r['p99_ms']:>10.2f}{r['rps']:>10.1f}")
+        previous = baseline["results"].get(name) if baseline else None
+        if previous:
+            line += f"{previous['p95_ms']:>10.2f}{previous['rps']:>10.1f}"
+        print(line)
+
+
+async def run(args) -> int:
+    if args.mongo_url:
+        os.environ['MONGO_URL'] = args.mongo_url
+    else:
+        try:
+            import mongomock_motor
+        except ImportError:
+            logger.error("mongomock-motor is required without --mongo-url: pip install mongomock-motor")
+            return 2
+        import motor.motor_asyncio
+        os.environ.setdefault('MONGO_URL', 'mongodb://bench.invalid:27017')
+        # Must happen before server builds its client
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    os.environ['DB_NAME'] = args.db_name
+    os.environ.setdefault('EMERGENT_LLM_KEY', 'bench')
+    os.environ.setdefault('VERIFY_QUERY_PLANS', 'false')
+
+    import server
+
+    FakeLlmChat.latency_seconds = args.llm_latency_ms / 1000
+    FakeLlmChat.jitter = args.llm_jitter
+    FakeLlmChat.failure_rate = args.llm_failure_rate
+    FakeLlmChat.rng = random.Random(args.seed)
+    server.llm.chat_class = FakeLlmChat
+
+    rng = random.Random(args.seed)
+    # Only the dedicated bench database is ever dropped
+    await server.database.client.drop_database(args.db_name)
+    await seed(server.db, rng, args.companies, args.news or args.companies * 10)
+
+    scenarios = build_scenarios(args.companies)
+    check_coverage(server.api_router, scenarios)
+    if args.only:
+        scenarios = [s for s in scenarios if re.search(args.only, s.name)]
+
+    results: Dict[str, Dict[str, float]] = {}
+    async with server.lifespan(server.app):
+        await server.timeseries.add_company_points(
+            [p for i in range(min(args.companies, 100)) for p in make_metric_points(rng, company_name(i))]
+        )
+        await server.timeseries.add_trend_points([p for t in TECHNOLOGIES for p in make_trend_points(rng, t)])
+        await server.collection_versions.record_write("company_metrics", "trend_points")
+        await server.news_search.ready.wait()
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            for scenario in sorted(scenarios, key=lambda s: s.writes):
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup, rng)
+                results[scenario.name] = result.summary()
+                logger.info(f"{scenario.name}: {results[scenario.name]}")
+        await server.database.client.drop_database(args.db_name)
+
+    report = {
+        "config": {
+            "companies": args.companies, "news": args.news or args.companies * 10, "requests": args.requests,
+            "concurrency": args.concurrency, "llm_latency_ms": args.llm_latency_ms,
+            "llm_failure_rate": args.llm_failure_rate, "mongo": "mongod" if args.mongo_url else "mongomock",
+        },
+        "results": results,
+    }
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_table(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+        logger.info(f"Baseline written to {args.save_baseline}")
+    if baseline:
+        if baseline["config"] != report["config"]:
+            logger.warning(f"Baseline was recorded with different settings: {baseline['config']}")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API against synthetic data.")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--news", type=int, help="defaults to 10 per company")
+    parser.add_argument("--mongo-url", help="use this mongod instead of in-process mongomock-motor")
+    parser.add_argument("--db-name", default="competitive_intel_bench",
+                        help="dropped before and after the run, so never point this at real data")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--only", help="regex over scenario names")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="median simulated LLM latency")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="log-normal sigma of the LLM latency")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare against this report")
+    parser.add_argument("--save-baseline", help="write the JSON report here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Per-request access logs would dominate the output
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from snapshots import VersionedMatrix
+
+CAPABILITY_METRICS = (
+    "ai_adoption",
+    "cloud_adoption",
+    "cybersecurity_adoption",
+    "analytics_adoption",
+    "innovation_score",
+    "execution_score",
+)
+METRICS = CAPABILITY_METRICS + ("yoy_growth", "market_share")
+
+
+class BenchmarkEngine(VersionedMatrix):
+    """Company metrics held as one float matrix (companies x metrics) for vectorized peer benchmarks.
+
+    z-scores and percentile ranks are computed once per load; a request only pays
+    for its composite (one mat-vec) and, for named companies, a small distance matrix.
+    """
+
+    fields = METRICS
+
+    def __init__(self, max_age_seconds: float = 60.0):
+        super().__init__(max_age_seconds)
+        self.names = np.empty(0, dtype=object)
+        self.index: Dict[str, int] = {}
+        self.values = np.empty((0, len(METRICS)))
+        self.zscores = np.empty((0, len(METRICS)))
+        self.percentiles = np.empty((0, len(METRICS)))
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def load(self, rows: List[Dict[str, Any]]):
+        self.names = np.array([row["name"] for row in rows], dtype=object)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.values = np.array([[row[m] for m in METRICS] for row in rows], dtype=np.float64).reshape(-1, len(METRICS))
+
+        mean = self.values.mean(axis=0) if len(rows) else np.zeros(len(METRICS))
+        std = self.values.std(axis=0) if len(rows) else np.zeros(len(METRICS))
+        safe_std = np.where(std > 0, std, 1.0)
+        self.zscores = np.where(std > 0, (self.values - mean) / safe_std, 0.0)
+
+        # Mid-rank percentiles: share of peers below plus half of those tied
+        n = len(rows)
+        self.percentiles = np.empty_like(self.values)
+        for j in range(len(METRICS)):
+            column = self.values[:, j]
+            ordered = np.sort(column)
+            below = np.searchsorted(ordered, column, side="left")
+            at_or_below = np.searchsorted(ordered, column, side="right")
+            self.percentiles[:, j] = (below + 0.5 * (at_or_below - below)) / max(n, 1) * 100
+
+        self.stats = {
+            metric: {
+                "mean": float(mean[j]),
+                "std": float(std[j]),
+                "min": float(self.values[:, j].min()) if n else 0.0,
+                "max": float(self.values[:, j].max()) if n else 0.0,
+            }
+            for j, metric in enumerate(METRICS)
+        }
+
+    def weight_vector(self, weights: Optional[Dict[str, float]]) -> np.ndarray:
+        if not weights:
+            weights = {metric: 1.0 for metric in CAPABILITY_METRICS}
+        unknown = set(weights) - set(METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+        vector = np.array([weights.get(metric, 0.0) for metric in METRICS])
+        total = np.abs(vector).sum()
+        if total == 0:
+            raise ValueError("At least one weight must be non-zero")
+        return vector / total
+
+    def rows_for(self, names: List[str]) -> Tuple[np.ndarray, List[str]]:
+        missing = [name for name in names if name not in self.index]
+        return np.array([self.index[name] for name in names if name in self.index], dtype=np.intp), missing
+
+    def benchmark(self, companies: Optional[List[str]], weights: Optional[Dict[str, float]], top: int
+                  ) -> Dict[str, Any]:
+        weight_vector = self.weight_vector(weights)
+        composite = self.zscores @ weight_vector
+
+        missing: List[str] = []
+        if companies:
+            rows, missing = self.rows_for(list(dict.fromkeys(companies)))
+        else:
+            k = min(top, len(self.names))
+            # Partial selection keeps top-k linear in the number of companies
+            rows = np.argpartition(-composite, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+            rows = rows[np.argsort(-composite[rows], kind="stable")]
+
+        # Rank 1 is the highest composite across the whole peer set
+        ordered = np.sort(composite)
+        ranks = len(ordered) - np.searchsorted(ordered, composite[rows], side="right") + 1
+
+        result = {
+            "metrics": list(METRICS),
+            "weights": dict(zip(METRICS, np.round(weight_vector, 6).tolist())),
+            "total": len(self.names),
+            "stats": self.stats,
+            "companies": [
+                {
+                    "name": self.names[i],
+                    "composite": round(float(composite[i]), 4),
+                    "rank": int(rank),
+                    "values": dict(zip(METRICS, self.values[i].tolist())),
+                    "zscores": dict(zip(METRICS, np.round(self.zscores[i], 4).tolist())),
+                    "percentiles": dict(zip(METRICS, np.round(self.percentiles[i], 2).tolist())),
+                }
+                for i, rank in zip(rows, ranks)
+            ],
+            "missing": missing,
+        }
+        if companies:
+            result["distances"] = {
+                "names": [self.names[i] for i in rows],
+                "matrix": np.round(pairwise_distances(self.zscores[rows]), 4).tolist(),
+            }
+        return result
+
+
+def pairwise_distances(points: np.ndarray) -> np.ndarray:
+    # ||a - b||^2 = ||a||^2 + ||b||^2 - 2ab, clipped for float error on the diagonal
+    squared = (points ** 2).sum(axis=1)
+    distances = squared[:, None] + squared[None, :] - 2 * points @ points.T
+    return np.sqrt(np.clip(distances, 0, None))
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("companies", "news", "trends", "market_sizing")
+
+
+class Subscriber:
+    def __init__(self, topics: Iterable[str], max_pending: int):
+        self.topics: Set[str] = set(topics)
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def offer(self, message: Dict[str, Any]):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A slow client gets one resync marker instead of an unbounded backlog
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+    async def next(self) -> Dict[str, Any]:
+        message = await self.queue.get()
+        if message.get("type") == "resync":
+            self.overflowed = False
+        return message
+
+
+class ChangeFeed:
+    """Fans out per-document changes to subscribers, one shared source for all of them.
+
+    The source is a Mongo change stream when the server supports it (replica sets,
+    sharded clusters). Standalone servers fall back to polling ``updated_at``, which
+    bulk ingest stamps on every write; that mode cannot observe deletes.
+    """
+
+    def __init__(self, db, topics: Iterable[str] = TOPICS, poll_seconds: float = 2.0,
+                 max_pending: int = 1000, on_change: Optional[Callable[[str], None]] = None,
+                 on_document: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.db = db
+        self.topics = tuple(topics)
+        self.poll_seconds = poll_seconds
+        self.max_pending = max_pending
+        self.on_change = on_change
+        self.on_document = on_document
+        self.mode: Optional[str] = None
+        self._subscribers: Dict[str, Set[Subscriber]] = {topic: set() for topic in self.topics}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, topics: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber([], self.max_pending)
+        self.update(subscriber, add=topics)
+        return subscriber
+
+    def update(self, subscriber: Subscriber, add: Iterable[str] = (), remove: Iterable[str] = ()):
+        for topic in add:
+            if topic in self._subscribers:
+                subscriber.topics.add(topic)
+                self._subscribers[topic].add(subscriber)
+        for topic in remove:
+            subscriber.topics.discard(topic)
+            self._subscribers.get(topic, set()).discard(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.update(subscriber, remove=list(subscriber.topics))
+
+    def subscriber_counts(self) -> Dict[str, int]:
+        return {topic: len(subscribers) for topic, subscribers in self._subscribers.items()}
+
+    def publish(self, message: Dict[str, Any], doc: Optional[Dict[str, Any]] = None):
+        topic = message["topic"]
+        if self.on_change:
+            self.on_change(topic)
+        # The full document, when known, even for updates whose message carries only the changes
+        if doc and self.on_document:
+            self.on_document(topic, doc)
+        for subscriber in list(self._subscribers.get(topic, ())):
+            subscriber.offer(message)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        try:
+            await self._watch()
+        except Exception as e:
+            # Standalone servers refuse change streams with an OperationFailure; other
+            # clients may not implement them at all
+            logger.info(f"Change streams unavailable ({str(e)}); polling updated_at every {self.poll_seconds}s")
+            await self._poll()
+
+    async def _watch(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(self.topics)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        resume_token = None
+        while True:
+            try:
+                async with self.db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                    self.mode = "change_stream"
+                    logger.info("Change feed following Mongo change stream")
+                    async for event in stream:
+                        resume_token = stream.resume_token
+                        self.publish(change_message(event), event.get("fullDocument"))
+            except OperationFailure:
+                if self.mode is None:
+                    raise
+                logger.exception("Change stream failed; resuming")
+            except PyMongoError:
+                logger.exception("Change stream interrupted; resuming")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _poll(self):
+        self.mode = "polling"
+        watermarks: Dict[str, datetime] = {topic: datetime.now(timezone.utc) for topic in self.topics}
+        # Documents already published at each watermark instant
+        boundary: Dict[str, Set[str]] = {topic: set() for topic in self.topics}
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            for topic in self.topics:
+                try:
+                    cursor = self.db[topic].find({"updated_at": {"$gte": watermarks[topic]}}).sort("updated_at", 1)
+                    async for doc in cursor:
+                        key = str(doc.pop("_id", None))
+                        stamp = as_utc(doc["updated_at"])
+                        if stamp > watermarks[topic]:
+                            watermarks[topic] = stamp
+                            boundary[topic] = set()
+                        # A bulk chunk shares one updated_at and lands a document at a time, so
+                        # $gte re-reads the boundary instant; skip what was already sent
+                        if key in boundary[topic]:
+                            continue
+                        boundary[topic].add(key)
+                        self.publish({"type": "change", "topic": topic, "op": "upsert", "id": doc.get("id"), "doc": doc}, doc)
+                except PyMongoError:
+                    logger.exception(f"Polling {topic} for changes failed")
+
+
+def as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def change_message(event: Dict[str, Any]) -> Dict[str, Any]:
+    op = event["operationType"]
+    message: Dict[str, Any] = {"type": "change", "topic": event["ns"]["coll"], "op": op}
+    doc = event.get("fullDocument")
+    if doc:
+        doc.pop("_id", None)
+        message["id"] = doc.get("id")
+    if op in ("insert", "replace"):
+        message["doc"] = doc
+    elif op == "update":
+        # Only the changed fields travel, not the whole document
+        description = event.get("updateDescription", {})
+        message["changes"] = description.get("updatedFields", {})
+        message["removed"] = description.get("removedFields", [])
+    elif op == "delete":
+        message["_id"] = str(event["documentKey"]["_id"])
+    return message
+
+
+def parse_topics(raw: Optional[Any]) -> List[str]:
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, list):
+        return []
+    return [topic.strip() for topic in raw if isinstance(topic, str) and topic.strip() in TOPICS]
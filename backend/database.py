@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
+
+from metrics import MongoCommandMetrics
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool counters fed by the driver's CMAP events (called from driver threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started: Dict[int, float] = {}
+        self.connections_open = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+        self.pool_clears = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_seconds_total": round(self.checkout_wait_seconds_total, 6),
+                "checkout_wait_seconds_max": round(self.checkout_wait_seconds_max, 6),
+                "pool_clears": self.pool_clears,
+            }
+
+    def _waited(self) -> float:
+        started = self._checkout_started.pop(threading.get_ident(), None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started[threading.get_ident()] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            waited = self._waited()
+            self.checkouts += 1
+            self.checked_out += 1
+            self.checkout_wait_seconds_total += waited
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, waited)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._waited()
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+            self.connections_open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+            self.connections_open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+class Database:
+    """Owns the Motor client: pool settings from the environment, a startup health check and shutdown.
+
+    ``db`` serves writes and read-your-writes paths; ``read_db`` carries the configured
+    read preference for endpoints that only read. It defaults to the primary: those
+    endpoints answer conditional GETs from collection versions that move right after each
+    write, so a lagging secondary would serve old rows under the new ETag.
+    """
+
+    def __init__(self, mongo_url: str, db_name: str):
+        self.pool_metrics = PoolMetrics()
+        self.settings = {
+            "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+            "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+            "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+            "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000')),
+            "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+            "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+            "appname": os.environ.get('MONGO_APP_NAME', 'competitive-intelligence-api'),
+        }
+        read_preference = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+        if read_preference not in READ_PREFERENCES:
+            raise ValueError(f"MONGO_READ_PREFERENCE must be one of {', '.join(READ_PREFERENCES)}")
+        self.read_preference = read_preference
+
+        # The driver connects lazily, so building the client here performs no I/O
+        self.client = AsyncIOMotorClient(
+            mongo_url, event_listeners=[self.pool_metrics, MongoCommandMetrics()], **self.settings
+        )
+        self.db = self.client.get_database(db_name)
+        self.read_db = self.client.get_database(db_name, read_preference=READ_PREFERENCES[read_preference])
+
+    async def ping(self) -> float:
+        started = time.perf_counter()
+        await self.db.command("ping")
+        return time.perf_counter() - started
+
+    async def connect(self, attempts: int = 5, delay_seconds: float = 1.0):
+        for attempt in range(1, attempts + 1):
+            try:
+                latency = await self.ping()
+                logger.info(
+                    f"MongoDB reachable in {latency * 1000:.1f} ms "
+                    f"(maxPoolSize={self.settings['maxPoolSize']}, reads={self.read_preference})"
+                )
+                return
+            except Exception as e:
+                if attempt == attempts:
+                    raise
+                logger.warning(f"MongoDB not reachable (attempt {attempt}/{attempts}): {str(e)}")
+                await asyncio.sleep(delay_seconds * attempt)
+
+    async def health(self) -> Dict[str, Any]:
+        try:
+            latency = await self.ping()
+            status = {"status": "ok", "ping_ms": round(latency * 1000, 2)}
+        except Exception as e:
+            status = {"status": "unavailable", "error": str(e)}
+        return {**status, "read_preference": self.read_preference, "pool": self.pool_metrics.snapshot(),
+                "settings": {k: v for k, v in self.settings.items() if k != "appname"}}
+
+    def close(self):
+        self.client.close()
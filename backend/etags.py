@@ -0,0 +1,53 @@
+import hashlib
+import time
+from typing import Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from metrics import record_cache_lookup
+from versions import CollectionVersions
+
+
+class ETags:
+    """Strong ETags derived from collection versions, so revalidation never touches Mongo.
+
+    With shared versions every worker issues the same tag for the same data. The tag also
+    carries a time window, so writes made outside the app stop matching within
+    ``max_age_seconds``.
+    """
+
+    def __init__(self, versions: CollectionVersions, max_age_seconds: float = 60.0,
+                 cache_control: str = "no-cache"):
+        self.versions = versions
+        self.max_age_seconds = max_age_seconds
+        self.cache_control = cache_control
+
+    def compute(self, request: Request, collections) -> str:
+        window = int(time.time() // self.max_age_seconds)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{window}:{request.url.path}?".encode())
+        digest.update(str(sorted(request.query_params.multi_items())).encode())
+        for name in collections:
+            digest.update(f"|{name}={self.versions.get(name)}".encode())
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses weak comparison, so a W/ prefix still matches
+        return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    def dependency(self, *collections: str) -> Callable:
+        async def check_etag(request: Request, response: Response) -> Dict[str, str]:
+            etag = self.compute(request, collections)
+            headers = {"ETag": etag, "Cache-Control": self.cache_control}
+            matched = self.matches(request.headers.get("if-none-match"), etag)
+            record_cache_lookup("http_etag", matched)
+            if matched:
+                raise HTTPException(status_code=304, headers=headers)
+            response.headers.update(headers)
+            return headers
+
+        return check_etag
@@ -0,0 +1,137 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Index definitions per collection, created idempotently at startup
+INDEXES: Dict[str, List[IndexModel]] = {
+    "companies": [
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Keyset pagination order for /api/companies
+        IndexModel([("name", ASCENDING), ("id", ASCENDING)], name="name_id"),
+        # Change feed polling on standalone servers
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "news": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Natural key for bulk ingest upserts
+        IndexModel([("title", ASCENDING), ("date", ASCENDING)], name="title_date_unique", unique=True),
+        # Serves company_name filters and their (date, id) pagination order
+        IndexModel(
+            [("company_name", ASCENDING), ("date", DESCENDING), ("id", DESCENDING)],
+            name="company_name_date_id",
+        ),
+        IndexModel([("date", DESCENDING), ("id", DESCENDING)], name="date_id"),
+        # Catch-up scans for the in-memory search index and change feed polling
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "trends": [
+        IndexModel([("technology", ASCENDING), ("year", ASCENDING)], name="technology_year_unique", unique=True),
+        # Change feed polling on standalone servers
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "market_sizing": [
+        IndexModel([("region", ASCENDING), ("industry", ASCENDING)], name="region_industry"),
+        # Natural key for bulk ingest upserts
+        IndexModel(
+            [("segment", ASCENDING), ("region", ASCENDING), ("industry", ASCENDING)],
+            name="segment_region_industry_unique",
+            unique=True,
+        ),
+        # Change feed polling on standalone servers
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+    ],
+    "company_metric_rollups": [
+        IndexModel(
+            [("company_name", ASCENDING), ("interval", ASCENDING), ("period_index", ASCENDING)],
+            name="company_interval_period_unique",
+            unique=True,
+        ),
+    ],
+    "trend_rollups": [
+        IndexModel([("technology", ASCENDING), ("year", ASCENDING)], name="technology_year_unique", unique=True),
+        IndexModel([("year", ASCENDING)], name="year"),
+    ],
+}
+
+# Raised by create_index when an index with the same keys exists with other options
+INDEX_OPTIONS_CONFLICT = 85
+
+# (collection, filter, sort) shapes the API issues on hot paths
+QuerySpec = Tuple[str, Dict[str, Any], List[Tuple[str, int]]]
+
+
+async def ensure_indexes(db):
+    for collection_name, models in INDEXES.items():
+        try:
+            created = await db[collection_name].create_indexes(models)
+            logger.info(f"Indexes ready on {collection_name}: {', '.join(created)}")
+        except PyMongoError as e:
+            # Typically duplicate keys blocking a unique index; keep serving without it
+            logger.error(f"Failed to create indexes on {collection_name}: {str(e)}")
+
+
+async def ensure_ttl_index(collection, field: str, expire_after_seconds: int):
+    """Create the TTL index on ``field``, or retune the existing one when the TTL setting changed.
+
+    ``create_index`` refuses to change the options of an existing index, so a new TTL goes
+    through ``collMod`` instead. Failures are logged: documents then just expire late.
+    """
+    try:
+        await collection.create_index(field, expireAfterSeconds=expire_after_seconds)
+        return
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            logger.error(f"Failed to create TTL index on {collection.name}.{field}: {str(e)}")
+            return
+    except PyMongoError as e:
+        logger.error(f"Failed to create TTL index on {collection.name}.{field}: {str(e)}")
+        return
+    try:
+        await collection.database.command(
+            "collMod", collection.name,
+            index={"keyPattern": {field: ASCENDING}, "expireAfterSeconds": expire_after_seconds},
+        )
+        logger.info(f"TTL on {collection.name}.{field} changed to {expire_after_seconds}s")
+    except PyMongoError as e:
+        logger.error(f"Failed to change TTL on {collection.name}.{field}: {str(e)}")
+
+
+def plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+async def verify_query_plans(db, queries: List[QuerySpec]) -> List[QuerySpec]:
+    """Explain each hot query and warn about plans that scan the collection or sort in memory."""
+    unindexed = []
+    for collection_name, query, sort in queries:
+        cursor = db[collection_name].find(query, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explanation = await cursor.explain()
+        except Exception as e:
+            logger.warning(f"Could not explain {collection_name} query {query}: {str(e)}")
+            continue
+        stages = plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages or "SORT" in stages:
+            unindexed.append((collection_name, query, sort))
+            logger.warning(
+                f"Query on {collection_name} filter={query} sort={sort} is not index-backed: {' -> '.join(stages)}"
+            )
+        else:
+            logger.info(f"Query on {collection_name} filter={query} sort={sort} uses {' -> '.join(stages)}")
+    return unindexed
@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from models import Company, CompanyNews, MarketSizing, TechnologyTrend
+from versions import SharedVersions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+# CSV cells for list fields hold items separated by this character
+CSV_LIST_SEPARATOR = ";"
+
+
+class IngestTarget(NamedTuple):
+    model: Type[BaseModel]
+    natural_key: Tuple[str, ...]
+
+
+INGEST_TARGETS: Dict[str, IngestTarget] = {
+    "companies": IngestTarget(Company, ("name",)),
+    "news": IngestTarget(CompanyNews, ("title", "date")),
+    "trends": IngestTarget(TechnologyTrend, ("technology", "year")),
+    "market_sizing": IngestTarget(MarketSizing, ("segment", "region", "industry")),
+}
+
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def aiter_file_lines(path: Path, read_size: int = 1 << 20) -> AsyncIterator[str]:
+    async def chunks():
+        with open(path, "rb") as f:
+            while True:
+                data = await asyncio.to_thread(f.read, read_size)
+                if not data:
+                    return
+                yield data
+
+    async for line in aiter_lines(chunks()):
+        yield line
+
+
+def list_fields(model: Type[BaseModel]) -> List[str]:
+    return [name for name, field in model.model_fields.items() if getattr(field.annotation, "__origin__", None) is list]
+
+
+async def parse_records(lines: AsyncIterator[str], fmt: str, model: Type[BaseModel]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield ``(line_number, record)``; a record that cannot be decoded is yielded as an exception."""
+    if fmt == "ndjson":
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+        return
+    if fmt != "csv":
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    # One record per line; quoted cells must not contain newlines
+    header: Optional[List[str]] = None
+    split_fields = set(list_fields(model))
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        cells = next(csv.reader([line]))
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        if len(cells) != len(header):
+            yield line_number, ValueError(f"expected {len(header)} columns, got {len(cells)}")
+            continue
+        record = {}
+        for name, cell in zip(header, cells):
+            if name in split_fields:
+                record[name] = [item.strip() for item in cell.split(CSV_LIST_SEPARATOR) if item.strip()]
+            elif cell != "":
+                record[name] = cell
+        yield line_number, record
+
+
+def upsert_operation(doc: Dict[str, Any], natural_key: Tuple[str, ...], updated_at: datetime) -> UpdateOne:
+    fields = {k: v for k, v in doc.items() if k != "id"}
+    # Lets in-memory indexes catch up on writes from any process
+    fields["updated_at"] = updated_at
+    # Keep the id of an existing document stable across re-ingests
+    return UpdateOne(
+        {name: doc[name] for name in natural_key},
+        {"$set": fields, "$setOnInsert": {"id": doc["id"]}},
+        upsert=True,
+    )
+
+
+async def write_chunk(collection, target: IngestTarget, chunk: List[Tuple[int, Any]], chunk_number: int
+                      ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    started = time.perf_counter()
+    valid: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for line_number, record in chunk:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            valid.append(target.model.model_validate(record).model_dump())
+        except (ValidationError, ValueError) as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": str(e)})
+            else:
+                errors.append({"line": line_number})
+
+    # Within a chunk the last occurrence of a natural key wins
+    latest = {tuple(doc[name] for name in target.natural_key): doc for doc in valid}
+    valid = list(latest.values())
+
+    result = {"upserted": 0, "modified": 0, "matched": 0, "write_errors": 0}
+    updated_at = datetime.now(timezone.utc)
+    if valid:
+        try:
+            outcome = await collection.bulk_write(
+                [upsert_operation(doc, target.natural_key, updated_at) for doc in valid], ordered=False
+            )
+            details = outcome.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            result["write_errors"] = len(details.get("writeErrors", []))
+        result["upserted"] = details.get("nUpserted", 0)
+        result["modified"] = details.get("nModified", 0)
+        result["matched"] = details.get("nMatched", 0)
+
+    seconds = time.perf_counter() - started
+    report = {
+        "chunk": chunk_number,
+        "rows": len(chunk),
+        "valid": len(chunk) - len(errors),
+        "invalid": len(errors),
+        **result,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(len(chunk) / seconds, 1) if seconds > 0 else None,
+        "errors": [e for e in errors if "error" in e],
+    }
+    return report, valid
+
+
+async def ingest(collection, target: IngestTarget, records: AsyncIterator[Tuple[int, Any]],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Validate and upsert records chunk by chunk, yielding each chunk's report and written documents."""
+    chunk: List[Tuple[int, Any]] = []
+    chunk_number = 0
+    async for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            chunk_number += 1
+            yield await write_chunk(collection, target, chunk, chunk_number)
+            chunk = []
+    if chunk:
+        chunk_number += 1
+        yield await write_chunk(collection, target, chunk, chunk_number)
+
+
+def summarize(reports: Iterable[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    totals = {"chunks": 0, "rows": 0, "valid": 0, "invalid": 0, "upserted": 0, "modified": 0,
+              "matched": 0, "write_errors": 0}
+    for report in reports:
+        totals["chunks"] += 1
+        for key in totals:
+            if key != "chunks":
+                totals[key] += report[key]
+    totals["seconds"] = round(seconds, 4)
+    totals["rows_per_second"] = round(totals["rows"] / seconds, 1) if seconds > 0 else None
+    return totals
+
+
+async def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Bulk-load NDJSON or CSV files into the dashboard database.")
+    parser.add_argument("collection", choices=sorted(INGEST_TARGETS))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["ndjson", "csv"],
+                        help="defaults to the file extension (.csv, otherwise ndjson)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    target = INGEST_TARGETS[args.collection]
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    collection = db[args.collection]
+    # Running servers pick these up within their version refresh interval
+    versions = SharedVersions(db.collection_versions)
+
+    started = time.perf_counter()
+    reports = []
+    try:
+        records = parse_records(aiter_file_lines(args.path), fmt, target.model)
+        async for report, docs in ingest(collection, target, records, args.chunk_size):
+            reports.append(report)
+            if docs:
+                try:
+                    await versions.bump(args.collection)
+                except PyMongoError as e:
+                    logger.warning(f"Could not bump the shared {args.collection} version: {str(e)}")
+            logger.info(
+                f"chunk {report['chunk']}: {report['rows']} rows, {report['invalid']} invalid, "
+                f"{report['upserted']} upserted, {report['modified']} modified, "
+                f"{report['rows_per_second']} rows/s"
+            )
+            for error in report["errors"]:
+                logger.warning(f"line {error['line']}: {error['error']}")
+    finally:
+        client.close()
+    print(json.dumps(summarize(reports, time.perf_counter() - started)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
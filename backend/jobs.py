@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from indexes import ensure_ttl_index
+from metrics import JOB_RUN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL = (SUCCEEDED, FAILED)
+
+# Lease bookkeeping and the dedup key stay internal
+PUBLIC_PROJECTION = {"_id": 0, "dedup_key": 0, "lease_owner": 0}
+TIMESTAMPS = ("created_at", "updated_at", "available_at", "lease_expires_at", "finished_at")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class PermanentJobError(Exception):
+    """The job can never succeed (e.g. its input no longer exists), so it is not retried."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _public(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if doc is None:
+        return None
+    for field in TIMESTAMPS:
+        value = doc.get(field)
+        if isinstance(value, datetime):
+            # pymongo hands back naive UTC datetimes
+            doc[field] = (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return doc
+
+
+class JobQueue:
+    """Jobs stored in a Mongo collection and claimed under a lease.
+
+    A worker claims a job by atomically flipping it to running with a lease expiry and keeps
+    renewing the lease while it works. A worker that dies stops renewing, so once the lease
+    lapses any other worker may claim the job again; results are only accepted from the
+    current lease holder. Active and succeeded jobs hold a unique ``dedup_key`` built from
+    their input hash, so submitting the same input again returns the existing job.
+    """
+
+    def __init__(self, collection, lease_seconds: float = 60.0, max_attempts: int = 3,
+                 backoff_seconds: float = 5.0, retention_seconds: int = 86400, poll_seconds: float = 1.0):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.retention_seconds = retention_seconds
+        self.poll_seconds = poll_seconds
+        # Replaced on every local write so waiters and idle workers wake without polling
+        self._changed = asyncio.Event()
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index("id", unique=True)
+            await self.collection.create_index("dedup_key", unique=True, sparse=True)
+            await self.collection.create_index([("status", 1), ("available_at", 1)])
+            await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        except PyMongoError as e:
+            logger.error(f"Failed to create job queue indexes: {str(e)}")
+        # Finished jobs (and with them their dedup keys) age out; active ones have no finished_at
+        await ensure_ttl_index(self.collection, "finished_at", self.retention_seconds)
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_activity(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], input_hash: str) -> Tuple[Dict[str, Any], bool]:
+        now = _now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "input": payload,
+            "input_hash": input_hash,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+            "available_at": now,
+        }
+        dedup_key = f"{kind}:{input_hash}"
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"dedup_key": dedup_key},
+                {"$setOnInsert": job},
+                projection=PUBLIC_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # A concurrent submission inserted the same key between our lookup and insert
+            doc = await self.collection.find_one({"dedup_key": dedup_key}, PUBLIC_PROJECTION)
+        created = doc["id"] == job["id"]
+        if created:
+            self._notify()
+        return _public(doc), created
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return _public(await self.collection.find_one({"id": job_id}, PUBLIC_PROJECTION))
+
+    async def wait_for_change(self, job_id: str, updated_at: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+        """Returns the job once its ``updated_at`` differs from the one given, or as-is after ``timeout``.
+
+        Writes from this process wake the wait immediately; writes from workers in other
+        processes are picked up by re-reading every ``poll_seconds``.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._changed
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["updated_at"] != updated_at or remaining <= 0:
+                return job
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, self.poll_seconds))
+            except asyncio.TimeoutError:
+                pass
+
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        now = _now()
+        lease = {
+            "status": RUNNING,
+            "lease_owner": worker_id,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            "updated_at": now,
+        }
+        job = await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": QUEUED, "available_at": {"$lte": now}},
+                # The previous holder stopped renewing its lease
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {"$set": lease, "$inc": {"attempts": 1}},
+            projection={"_id": 0},
+            sort=[("available_at", 1)],
+            # The claimed document no longer matches the filter, which some Mongo
+            # implementations re-apply to find the updated version; patch it here instead
+            return_document=ReturnDocument.BEFORE,
+        )
+        if job is None:
+            return None
+        job.update(lease, attempts=job["attempts"] + 1)
+        self._notify()
+        if job["attempts"] > job["max_attempts"]:
+            # Every attempt so far lost its worker mid-run; stop handing the job out
+            await self.fail(job, worker_id, "Lease expired on every attempt", retry=False)
+            return None
+        return job
+
+    async def renew(self, job_id: str, worker_id: str) -> bool:
+        result = await self.collection.update_one(
+            {"id": job_id, "status": RUNNING, "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": _now() + timedelta(seconds=self.lease_seconds)}},
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        now = _now()
+        outcome = await self.collection.update_one(
+            {"id": job_id, "status": RUNNING, "lease_owner": worker_id},
+            {
+                "$set": {"status": SUCCEEDED, "result": result, "error": None, "updated_at": now, "finished_at": now},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""},
+            },
+        )
+        self._notify()
+        return outcome.matched_count == 1
+
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str, retry: bool = True) -> bool:
+        now = _now()
+        if retry and job["attempts"] < job["max_attempts"]:
+            delay = self.backoff_seconds * 2 ** (job["attempts"] - 1) * (0.5 + random.random())
+            update = {
+                "$set": {"status": QUEUED, "error": error, "updated_at": now,
+                         "available_at": now + timedelta(seconds=delay)},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""},
+            }
+        else:
+            # Dropping the dedup key lets the same input be submitted afresh
+            update = {
+                "$set": {"status": FAILED, "error": error, "updated_at": now, "finished_at": now},
+                "$unset": {"lease_owner": "", "lease_expires_at": "", "dedup_key": ""},
+            }
+        outcome = await self.collection.update_one(
+            {"id": job["id"], "status": RUNNING, "lease_owner": worker_id}, update
+        )
+        self._notify()
+        return outcome.matched_count == 1
+
+    async def release(self, worker_ids: List[str]) -> int:
+        # A clean shutdown hands its jobs back at once instead of waiting out the lease
+        result = await self.collection.update_many(
+            {"status": RUNNING, "lease_owner": {"$in": worker_ids}},
+            {
+                "$set": {"status": QUEUED, "available_at": _now(), "updated_at": _now()},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""},
+                "$inc": {"attempts": -1},
+            },
+        )
+        return result.modified_count
+
+
+class JobWorkers:
+    """A pool of in-process workers draining a JobQueue, one job per worker at a time.
+
+    Each worker holds leases under its own id, so a job re-claimed by a sibling after its
+    lease lapsed is not still accepted from the worker that lost it.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Handler], concurrency: int = 4):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        process_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.worker_ids = [f"{process_id}-{i}" for i in range(concurrency)]
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run(worker_id)) for worker_id in self.worker_ids]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            released = await self.queue.release(self.worker_ids)
+            if released:
+                logger.info(f"Released {released} running jobs back to the queue")
+        except Exception as e:
+            # Their leases expire on their own
+            logger.warning(f"Could not release running jobs: {str(e)}")
+
+    async def _run(self, worker_id: str):
+        while True:
+            try:
+                job = await self.queue.claim(worker_id)
+            except Exception as e:
+                logger.warning(f"Job claim failed: {str(e)}")
+                job = None
+            if job is None:
+                await self.queue.wait_for_activity(self.queue.poll_seconds)
+                continue
+            await self._execute(job, worker_id)
+
+    async def _heartbeat(self, job_id: str, worker_id: str):
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await self.queue.renew(job_id, worker_id):
+                    logger.warning(f"Lost the lease on job {job_id}; its result will be discarded")
+                    return
+            except Exception as e:
+                logger.warning(f"Lease renewal for job {job_id} failed: {str(e)}")
+
+    async def _execute(self, job: Dict[str, Any], worker_id: str):
+        kind = job["kind"]
+        handler = self.handlers.get(kind)
+        started = time.perf_counter()
+        outcome = "failed"
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], worker_id))
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler for job kind '{kind}'")
+            result = await handler(job["input"])
+            outcome = "succeeded"
+            await self.queue.complete(job["id"], worker_id, result)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except PermanentJobError as e:
+            logger.warning(f"Job {job['id']} ({kind}) failed permanently: {str(e)}")
+            await self._fail(job, worker_id, str(e), retry=False)
+        except Exception as e:
+            outcome = "retried" if job["attempts"] < job["max_attempts"] else "failed"
+            logger.warning(f"Job {job['id']} ({kind}) attempt {job['attempts']}/{job['max_attempts']} failed: {e!r}")
+            await self._fail(job, worker_id, repr(e), retry=True)
+        finally:
+            heartbeat.cancel()
+            JOB_RUN_SECONDS.observe(time.perf_counter() - started, kind, outcome)
+
+    async def _fail(self, job: Dict[str, Any], worker_id: str, error: str, retry: bool):
+        try:
+            await self.queue.fail(job, worker_id, error, retry=retry)
+        except Exception as e:
+            # The lease lapses and another claim retries the job
+            logger.warning(f"Could not record failure of job {job['id']}: {str(e)}")
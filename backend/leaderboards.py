@@ -0,0 +1,99 @@
+import asyncio
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+METRICS = ("yoy_growth", "innovation_score", "execution_score", "market_share")
+FIELDS = ("id", "name") + METRICS
+QUADRANTS = ("Leaders", "Visionaries", "Performers", "Challengers")
+
+
+class Leaderboards:
+    """Per-metric rankings and positioning quadrants kept sorted as companies change.
+
+    Each metric holds a list of ``(-value, name)`` kept in order with bisect, so an
+    update costs one removal and one insertion and a top-N read is a slice.
+    """
+
+    def __init__(self, quadrant_threshold: float = 8.0, max_age_seconds: float = 60.0):
+        self.quadrant_threshold = quadrant_threshold
+        self.max_age_seconds = max_age_seconds
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._rankings: Dict[str, List[Tuple[float, str]]] = {metric: [] for metric in METRICS}
+        self._quadrants: Dict[str, Dict[str, None]] = {quadrant: {} for quadrant in QUADRANTS}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def quadrant_of(self, row: Dict[str, Any]) -> str:
+        innovative = row["innovation_score"] >= self.quadrant_threshold
+        executes = row["execution_score"] >= self.quadrant_threshold
+        if innovative and executes:
+            return "Leaders"
+        if innovative:
+            return "Visionaries"
+        if executes:
+            return "Performers"
+        return "Challengers"
+
+    def load(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = {row["name"]: {field: row[field] for field in FIELDS} for row in rows}
+        self._rankings = {
+            metric: sorted((-row[metric], name) for name, row in self._rows.items())
+            for metric in METRICS
+        }
+        self._quadrants = {quadrant: {} for quadrant in QUADRANTS}
+        for name, row in self._rows.items():
+            self._quadrants[self.quadrant_of(row)][name] = None
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, row: Dict[str, Any]):
+        name = row["name"]
+        previous = self._rows.get(name)
+        self.remove(name)
+        row = {field: row[field] for field in FIELDS}
+        if previous is not None:
+            # Re-ingesting by name keeps the id stored first
+            row["id"] = previous["id"]
+        self._rows[name] = row
+        for metric in METRICS:
+            insort(self._rankings[metric], (-row[metric], name))
+        self._quadrants[self.quadrant_of(row)][name] = None
+
+    def remove(self, name: str):
+        row = self._rows.pop(name, None)
+        if row is None:
+            return
+        for metric in METRICS:
+            ranking = self._rankings[metric]
+            del ranking[bisect_left(ranking, (-row[metric], name))]
+        del self._quadrants[self.quadrant_of(row)][name]
+
+    def top(self, metric: str, n: int) -> List[Dict[str, Any]]:
+        return [self._rows[name] for _, name in self._rankings[metric][:n]]
+
+    def quadrants(self) -> Dict[str, List[str]]:
+        return {quadrant: list(members) for quadrant, members in self._quadrants.items()}
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return list(self._rows.values())
+
+    def snapshot(self, n: int) -> Dict[str, Any]:
+        return {
+            "top": {metric: self.top(metric, n) for metric in METRICS},
+            "quadrants": self.quadrants(),
+            "total": len(self._rows),
+        }
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.max_age_seconds
+
+    async def refresh(self, collection, force: bool = False):
+        # Writes arrive through upsert; the periodic reload is a backstop for deletes and missed events
+        if not force and not self.is_stale():
+            return
+        async with self._lock:
+            if not force and not self.is_stale():
+                return
+            projection = {field: 1 for field in FIELDS}
+            projection["_id"] = 0
+            self.load(await collection.find({}, projection).to_list(None))
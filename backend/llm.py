@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import litellm
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+from metrics import LLM_FAILOVERS, LLM_HEDGES, LLM_RATE_LIMIT_WAIT_SECONDS, LLM_TOKENS, track_llm_call
+from tokenizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+Route = Tuple[str, str]
+
+
+class LlmUnavailable(Exception):
+    """Every configured model failed or timed out."""
+
+
+class LlmRateLimited(Exception):
+    """The provider's request budget would not free up before the call's deadline."""
+
+
+class LlmDeadlineExceeded(Exception):
+    """The call's overall deadline ran out, e.g. while queued for a concurrency slot."""
+
+
+def parse_models(spec: str) -> List[Route]:
+    routes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, _, model = item.partition("/")
+        if not provider or not model:
+            raise ValueError(f"LLM model '{item}' must look like provider/model")
+        routes.append((provider, model))
+    if not routes:
+        raise ValueError("At least one LLM model is required")
+    return routes
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts up to ``capacity``; waiters are served in order.
+
+    A caller reserves its token up front, driving the balance negative while others are
+    queued, so the wait is known before committing to it.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Takes a token and returns how long to wait for it, or None if that exceeds ``max_wait``."""
+        self._refill()
+        wait = max(0.0, (1 - self._tokens) / self.rate)
+        if max_wait is not None and wait > max_wait:
+            return None
+        self._tokens -= 1
+        return wait
+
+    def try_acquire(self) -> bool:
+        # Never jump the queue ahead of callers already waiting
+        return self.reserve(0.0) is not None
+
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        wait = self.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._tokens += 1
+                raise
+        return True
+
+
+@dataclass
+class LlmResult:
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_seconds: float
+
+
+class LlmExecutor:
+    """Shared path for LLM calls: per-provider rate limits and concurrency caps, per-call timeouts,
+    a hedged second attempt when the first is slow, and ordered failover across models.
+
+    LlmChat keeps conversation history, so every call gets a fresh one; the provider SDK
+    underneath pools connections, and the per-provider semaphore bounds how many are in use.
+    LlmChat only returns whole replies, so ``stream`` talks to litellm directly, through
+    ``stream_api_base`` when the key belongs to a proxy.
+    """
+
+    chat_class = LlmChat
+
+    def __init__(self, api_key: Optional[str], routes: List[Route], timeout_seconds: float = 30.0,
+                 hedge_after_seconds: float = 0.0, requests_per_minute: float = 0.0, burst: int = 10,
+                 max_concurrency: int = 16, cooldown_seconds: float = 30.0, deadline_seconds: float = 0.0,
+                 stream_api_base: Optional[str] = None):
+        self.api_key = api_key
+        self.stream_api_base = stream_api_base
+        self.routes = routes
+        self.timeout_seconds = timeout_seconds
+        # Bounds a whole call: rate-limit waits, queueing for a slot, attempts and failover
+        self.deadline_seconds = deadline_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.cooldown_seconds = cooldown_seconds
+        providers = dict.fromkeys(provider for provider, _ in routes)
+        self._buckets: Dict[str, Optional[TokenBucket]] = {
+            provider: TokenBucket(requests_per_minute / 60, burst) if requests_per_minute > 0 else None
+            for provider in providers
+        }
+        self._slots = {provider: asyncio.Semaphore(max_concurrency) for provider in providers}
+        self._cooling_until: Dict[Route, float] = {}
+
+    @property
+    def primary(self) -> str:
+        provider, model = self.routes[0]
+        return f"{provider}/{model}"
+
+    def ordered_routes(self) -> List[Route]:
+        now = time.monotonic()
+        healthy = [route for route in self.routes if self._cooling_until.get(route, 0.0) <= now]
+        # Models that failed recently are tried last rather than dropped
+        return healthy + [route for route in self.routes if route not in healthy]
+
+    async def complete(self, system_message: str, text: str, session_id: str) -> LlmResult:
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds > 0 else None
+        prompt_tokens = count_tokens(system_message) + count_tokens(text)
+        routes = self.ordered_routes()
+        last_error: Optional[BaseException] = None
+        for i, route in enumerate(routes):
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                last_error = asyncio.TimeoutError(f"deadline of {self.deadline_seconds}s exceeded")
+                break
+            try:
+                response = await self._hedged(route, system_message, text, session_id, prompt_tokens, deadline)
+            except LlmDeadlineExceeded as e:
+                # Time ran out on our side; that says nothing about the model's health
+                last_error = e
+                break
+            except LlmRateLimited as e:
+                # The provider is healthy, just busy, so it is not put on cooldown
+                last_error = e
+                logger.info(f"Skipping {route[0]}/{route[1]}: {str(e)}")
+                if i + 1 < len(routes):
+                    LLM_FAILOVERS.inc(*route)
+                continue
+            except Exception as e:
+                last_error = e
+                self._cooling_until[route] = time.monotonic() + self.cooldown_seconds
+                provider, model = route
+                logger.warning(f"LLM call to {provider}/{model} failed: {e!r}")
+                if i + 1 < len(routes):
+                    LLM_FAILOVERS.inc(provider, model)
+                continue
+            self._cooling_until.pop(route, None)
+            completion_tokens = count_tokens(response)
+            LLM_TOKENS.inc(*route, "completion", amount=completion_tokens)
+            return LlmResult(
+                response, *route, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                latency_seconds=time.perf_counter() - started,
+            )
+        raise LlmUnavailable(f"All LLM models failed; last error: {last_error!r}") from last_error
+
+    async def stream(self, system_message: str, text: str, session_id: str) -> AsyncIterator[str]:
+        """Yields the completion as the model produces it.
+
+        Rate limits, concurrency caps, the deadline and cooldowns apply as in ``complete``, and
+        ``timeout_seconds`` bounds the wait for each chunk. A model can only be failed over from
+        before its first chunk, and streams are not hedged.
+        """
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds > 0 else None
+        prompt_tokens = count_tokens(system_message) + count_tokens(text)
+        routes = self.ordered_routes()
+        last_error: Optional[BaseException] = None
+        for i, route in enumerate(routes):
+            provider, model = route
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                last_error = asyncio.TimeoutError(f"deadline of {self.deadline_seconds}s exceeded")
+                break
+            completion: List[str] = []
+            try:
+                await self._acquire(provider, deadline)
+                async with self._slot(provider, deadline):
+                    LLM_TOKENS.inc(provider, model, "prompt", amount=prompt_tokens)
+                    with track_llm_call(provider, model):
+                        async for chunk in self._paced(self._open_stream(route, system_message, text), deadline):
+                            completion.append(chunk)
+                            yield chunk
+            except LlmDeadlineExceeded as e:
+                if completion:
+                    raise LlmUnavailable(f"{provider}/{model} stream cut off: {str(e)}") from e
+                last_error = e
+                break
+            except LlmRateLimited as e:
+                last_error = e
+                logger.info(f"Skipping {provider}/{model}: {str(e)}")
+                if i + 1 < len(routes):
+                    LLM_FAILOVERS.inc(provider, model)
+                continue
+            except Exception as e:
+                self._cooling_until[route] = time.monotonic() + self.cooldown_seconds
+                logger.warning(f"LLM stream from {provider}/{model} failed: {e!r}")
+                if completion:
+                    # Part of the reply is already with the caller; another model cannot continue it
+                    raise LlmUnavailable(f"{provider}/{model} stream failed midway: {e!r}") from e
+                last_error = e
+                if i + 1 < len(routes):
+                    LLM_FAILOVERS.inc(provider, model)
+                continue
+            self._cooling_until.pop(route, None)
+            LLM_TOKENS.inc(provider, model, "completion", amount=count_tokens("".join(completion)))
+            return
+        raise LlmUnavailable(f"All LLM models failed; last error: {last_error!r}") from last_error
+
+    async def _open_stream(self, route: Route, system_message: str, text: str) -> AsyncIterator[str]:
+        provider, model = route
+        response = await litellm.acompletion(
+            model=f"{provider}/{model}",
+            messages=[{"role": "system", "content": system_message}, {"role": "user", "content": text}],
+            api_key=self.api_key,
+            api_base=self.stream_api_base,
+            stream=True,
+        )
+        async for part in response:
+            delta = part.choices[0].delta.content if part.choices else None
+            if delta:
+                yield delta
+
+    async def _paced(self, chunks: AsyncIterator[str], deadline: Optional[float]) -> AsyncIterator[str]:
+        try:
+            while True:
+                remaining = _remaining(deadline)
+                timeout = self.timeout_seconds if remaining is None else min(self.timeout_seconds, remaining)
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    remaining = _remaining(deadline)
+                    if remaining is not None and remaining <= 0:
+                        raise LlmDeadlineExceeded(f"deadline of {self.deadline_seconds}s exceeded") from None
+                    raise
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    @asynccontextmanager
+    async def _slot(self, provider: str, deadline: Optional[float]):
+        try:
+            await asyncio.wait_for(self._slots[provider].acquire(), _remaining(deadline))
+        except asyncio.TimeoutError:
+            raise LlmDeadlineExceeded(f"deadline of {self.deadline_seconds}s exceeded") from None
+        try:
+            yield
+        finally:
+            self._slots[provider].release()
+
+    async def _acquire(self, provider: str, deadline: Optional[float]):
+        bucket = self._buckets[provider]
+        if bucket is None:
+            return
+        with LLM_RATE_LIMIT_WAIT_SECONDS.time(provider):
+            if not await bucket.acquire(_remaining(deadline)):
+                raise LlmRateLimited(f"{provider} request budget would outlast the deadline")
+
+    def _try_acquire(self, provider: str) -> bool:
+        bucket = self._buckets[provider]
+        return bucket is None or bucket.try_acquire()
+
+    async def _attempt(self, route: Route, system_message: str, text: str, session_id: str,
+                       prompt_tokens: int, deadline: Optional[float]) -> str:
+        # Waiting for a concurrency slot counts against the deadline as well
+        try:
+            return await asyncio.wait_for(
+                self._send(route, system_message, text, session_id, prompt_tokens, deadline), _remaining(deadline)
+            )
+        except asyncio.TimeoutError:
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                raise LlmDeadlineExceeded(f"deadline of {self.deadline_seconds}s exceeded") from None
+            raise
+
+    async def _send(self, route: Route, system_message: str, text: str, session_id: str,
+                    prompt_tokens: int, deadline: Optional[float]) -> str:
+        provider, model = route
+        async with self._slots[provider]:
+            chat = self.chat_class(
+                api_key=self.api_key, session_id=session_id, system_message=system_message
+            ).with_model(provider, model)
+            LLM_TOKENS.inc(provider, model, "prompt", amount=prompt_tokens)
+            remaining = _remaining(deadline)
+            timeout = self.timeout_seconds if remaining is None else min(self.timeout_seconds, remaining)
+            with track_llm_call(provider, model):
+                return await asyncio.wait_for(chat.send_message(UserMessage(text=text)), timeout)
+
+    async def _hedged(self, route: Route, system_message: str, text: str, session_id: str,
+                      prompt_tokens: int, deadline: Optional[float]) -> str:
+        provider, model = route
+        await self._acquire(provider, deadline)
+        if self.hedge_after_seconds <= 0:
+            return await self._attempt(route, system_message, text, session_id, prompt_tokens, deadline)
+
+        first = asyncio.ensure_future(
+            self._attempt(route, system_message, text, session_id, prompt_tokens, deadline)
+        )
+        pending = {first}
+        try:
+            await asyncio.wait(pending, timeout=self.hedge_after_seconds)
+            # Hedges only spend spare budget; they never queue behind the rate limit
+            if not first.done() and self._try_acquire(provider):
+                LLM_HEDGES.inc(provider, model)
+                pending.add(asyncio.ensure_future(
+                    self._attempt(route, system_message, text, session_id, prompt_tokens, deadline)
+                ))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                    else:
+                        error = task.exception()
+                if winner is not None:
+                    return winner.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
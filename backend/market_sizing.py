@@ -0,0 +1,179 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from metrics import record_cache_lookup
+from snapshots import VersionedMatrix
+
+DIMENSIONS = ("region", "industry", "segment")
+EMPTY_TOTAL = {"tam": 0.0, "sam": 0.0, "som": 0.0, "segments": 0, "growth_projection": 0.0}
+
+
+def _group_stage(key: Optional[str]) -> Dict[str, Any]:
+    return {"$group": {
+        "_id": f"${key}" if key else None,
+        "tam": {"$sum": "$tam"},
+        "sam": {"$sum": "$sam"},
+        "som": {"$sum": "$som"},
+        "segments": {"$sum": 1},
+        "weighted_growth": {"$sum": {"$multiply": ["$tam", "$growth_projection"]}},
+    }}
+
+
+def _project_stage(key: Optional[str]) -> Dict[str, Any]:
+    fields = {"_id": 0, "tam": 1, "sam": 1, "som": 1, "segments": 1}
+    if key:
+        fields[key] = "$_id"
+    # Growth of a rollup is the TAM-weighted mean of its rows
+    fields["growth_projection"] = {
+        "$cond": [{"$gt": ["$tam", 0]}, {"$divide": ["$weighted_growth", "$tam"]}, 0]
+    }
+    return {"$project": fields}
+
+
+def rollup_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # One round trip: every dimension and the grand total are facets of the same scan
+    facets = {
+        dimension: [_group_stage(dimension), _project_stage(dimension), {"$sort": {"tam": -1}}]
+        for dimension in DIMENSIONS
+    }
+    facets["total"] = [_group_stage(None), _project_stage(None)]
+    return [{"$match": match}, {"$facet": facets}]
+
+
+async def rollups(collection, match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    result = (await collection.aggregate(rollup_pipeline(match or {})).to_list(1))[0]
+    return {
+        "total": result["total"][0] if result["total"] else dict(EMPTY_TOTAL),
+        **{f"by_{dimension}": result[dimension] for dimension in DIMENSIONS},
+    }
+
+
+class MarketProjectionEngine(VersionedMatrix):
+    """Market sizing rows as columns for compounding growth_projection across what-if scenarios.
+
+    A request evaluates all uncached scenarios together: each year is a couple of
+    (scenarios x segments) products, so thousands of segments cost one pass per year.
+    Results are cached per scenario, keyed by a hash of its parameters and the data version.
+    """
+
+    fields = ("tam", "sam", "som", "growth_projection")
+    key = ("segment", "region", "industry")
+
+    def __init__(self, max_entries: int = 1024, max_age_seconds: float = 60.0):
+        super().__init__(max_age_seconds)
+        self.max_entries = max_entries
+        self.tam = np.empty(0)
+        self.sam = np.empty(0)
+        self.som = np.empty(0)
+        self.growth = np.empty(0)
+        self.labels: Dict[str, np.ndarray] = {d: np.empty(0, dtype=object) for d in DIMENSIONS}
+        self.codes: Dict[str, np.ndarray] = {d: np.empty(0, dtype=np.int64) for d in DIMENSIONS}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def load(self, rows: List[Dict[str, Any]]):
+        self.tam = np.array([row["tam"] for row in rows], dtype=np.float64)
+        self.sam = np.array([row["sam"] for row in rows], dtype=np.float64)
+        self.som = np.array([row["som"] for row in rows], dtype=np.float64)
+        self.growth = np.array([row["growth_projection"] for row in rows], dtype=np.float64)
+        for dimension in DIMENSIONS:
+            values = np.array([row[dimension] for row in rows], dtype=object)
+            if len(rows):
+                self.labels[dimension], self.codes[dimension] = np.unique(values, return_inverse=True)
+            else:
+                self.labels[dimension], self.codes[dimension] = values, np.empty(0, dtype=np.int64)
+        # Entries for the previous data can never be hit again
+        self._cache.clear()
+
+    def cache_key(self, scenario: Dict[str, Any], years: int, group_by: Optional[str]) -> str:
+        params = json.dumps([scenario, years, group_by, self._version], sort_keys=True, default=str)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+    def project(self, scenarios: List[Dict[str, Any]], years: int,
+                group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        keys = [self.cache_key(scenario, years, group_by) for scenario in scenarios]
+        results: List[Optional[Dict[str, Any]]] = []
+        for key in keys:
+            cached = self._cache.get(key)
+            record_cache_lookup("market_projection", cached is not None)
+            if cached is not None:
+                self._cache.move_to_end(key)
+            results.append(cached)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            computed = self._compute([scenarios[i] for i in pending], years, group_by)
+            for i, result in zip(pending, computed):
+                results[i] = result
+                self._cache[keys[i]] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return results
+
+    def _mask(self, scenario: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(self.tam), dtype=bool)
+        for dimension, field in (("region", "regions"), ("industry", "industries"), ("segment", "segments")):
+            wanted = scenario.get(field)
+            if wanted:
+                allowed = np.isin(self.labels[dimension], wanted)
+                mask &= allowed[self.codes[dimension]]
+        return mask
+
+    def _compute(self, scenarios: List[Dict[str, Any]], years: int,
+                 group_by: Optional[str]) -> List[Dict[str, Any]]:
+        multiplier = np.array([s.get("growth_multiplier", 1.0) for s in scenarios])[:, None]
+        delta = np.array([s.get("growth_delta", 0.0) for s in scenarios])[:, None]
+        share = np.array([s.get("som_share_multiplier", 1.0) for s in scenarios])[:, None]
+        mask = np.array([self._mask(s) for s in scenarios]).reshape(len(scenarios), len(self.tam))
+
+        # Growth below -100% would flip signs; a segment can at most vanish
+        rate = np.maximum(1 + (self.growth[None, :] * multiplier + delta) / 100, 0.0)
+        # SOM can grow with share but never past what is serviceable
+        som = np.minimum(self.som[None, :] * share, self.sam[None, :])
+
+        factor = mask.astype(np.float64)
+        tam_by_year = np.empty((len(scenarios), years + 1))
+        sam_by_year = np.empty_like(tam_by_year)
+        som_by_year = np.empty_like(tam_by_year)
+        for year in range(years + 1):
+            if year:
+                factor *= rate
+            tam_by_year[:, year] = factor @ self.tam
+            sam_by_year[:, year] = factor @ self.sam
+            som_by_year[:, year] = (factor * som).sum(axis=1)
+
+        results = []
+        for s, scenario in enumerate(scenarios):
+            start, end = tam_by_year[s, 0], tam_by_year[s, -1]
+            result = {
+                "name": scenario.get("name", "base"),
+                "segments": int(mask[s].sum()),
+                "tam_cagr": float(((end / start) ** (1 / years) - 1) * 100) if start > 0 else 0.0,
+                "projection": [
+                    {
+                        "years_ahead": year,
+                        "tam": float(tam_by_year[s, year]),
+                        "sam": float(sam_by_year[s, year]),
+                        "som": float(som_by_year[s, year]),
+                    }
+                    for year in range(years + 1)
+                ],
+            }
+            if group_by:
+                codes = self.codes[group_by]
+                groups = len(self.labels[group_by])
+                horizon = {
+                    name: np.bincount(codes, weights=factor[s] * values, minlength=groups)
+                    for name, values in (("tam", self.tam), ("sam", self.sam), ("som", som[s]))
+                }
+                present = np.bincount(codes, weights=mask[s], minlength=groups) > 0
+                result["breakdown"] = [
+                    {group_by: self.labels[group_by][g], **{name: float(v[g]) for name, v in horizon.items()}}
+                    for g in np.flatnonzero(present)
+                ]
+                result["breakdown"].sort(key=lambda row: row["tam"], reverse=True)
+            results.append(result)
+        return results
@@ -0,0 +1,108 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Dict, List, Optional
+import uuid
+
+# Define Models
+class Company(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    revenue: float  # in billions
+    yoy_growth: float  # percentage
+    consulting_mix: float  # percentage
+    tech_services_mix: float  # percentage
+    global_presence: int  # number of countries
+    key_services: List[str]
+    major_clients: List[str]
+    ai_adoption: float  # score 1-10
+    cloud_adoption: float  # score 1-10
+    cybersecurity_adoption: float  # score 1-10
+    analytics_adoption: float  # score 1-10
+    innovation_score: float  # score 1-10
+    execution_score: float  # score 1-10
+    market_share: float  # percentage
+
+class CompanyNews(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    company_name: str
+    title: str
+    description: str
+    category: str  # Innovation, Risk, Talent, Finance, Customer
+    date: str
+    impact: str  # High, Medium, Low
+
+class SWOTRequest(BaseModel):
+    company_name: str
+
+class SWOTBatchRequest(BaseModel):
+    company_names: List[str] = Field(..., min_length=1, max_length=1000)
+
+class SWOTResponse(BaseModel):
+    company_name: str
+    strengths: List[str]
+    weaknesses: List[str]
+    opportunities: List[str]
+    threats: List[str]
+
+class TechnologyTrend(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    technology: str
+    adoption_rate: float  # percentage
+    growth_rate: float  # percentage
+    market_size: float  # in billions
+    year: int
+
+class MarketSizing(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    segment: str
+    tam: float  # Total Addressable Market in billions
+    sam: float  # Serviceable Available Market in billions
+    som: float  # Serviceable Obtainable Market in billions
+    region: str
+    industry: str
+    growth_projection: float  # percentage
+
+class CompanyMetricPoint(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    company_name: str
+    year: int
+    quarter: int = Field(ge=1, le=4)
+    revenue: float  # in billions, for the quarter
+    yoy_growth: float  # percentage
+    market_share: float  # percentage
+
+class TrendPoint(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    technology: str
+    year: int
+    adoption_rate: float  # percentage
+    growth_rate: float  # percentage
+    market_size: float  # in billions
+
+class BenchmarkRequest(BaseModel):
+    companies: Optional[List[str]] = Field(None, max_length=500)  # rows to return and compare pairwise
+    weights: Optional[Dict[str, float]] = None  # metric -> weight for the composite index
+    top: int = Field(10, ge=1, le=1000)  # leaders by composite when no companies are given
+
+class MarketScenario(BaseModel):
+    name: str = "base"
+    growth_multiplier: float = Field(1.0, ge=0, le=10)  # scales each row's growth_projection
+    growth_delta: float = Field(0.0, ge=-100, le=100)  # percentage points added after scaling
+    som_share_multiplier: float = Field(1.0, ge=0, le=10)  # scales SOM, capped at SAM
+    regions: Optional[List[str]] = None  # rows to include; all when omitted
+    industries: Optional[List[str]] = None
+    segments: Optional[List[str]] = None
+
+class MarketProjectionRequest(BaseModel):
+    scenarios: List[MarketScenario] = Field(default_factory=lambda: [MarketScenario()], min_length=1, max_length=100)
+    years: int = Field(5, ge=1, le=30)
+    group_by: Optional[str] = Field(None, pattern="^(region|industry|segment)$")  # horizon breakdown
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import math
+import re
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in into is it its of on or that the to with".split()
+)
+TITLE_BOOST = 2.0
+FACET_FIELDS = ("category", "impact")
+SEARCH_FIELDS = {"_id": 0, "id": 1, "company_name": 1, "title": 1, "description": 1,
+                 "category": 1, "impact": 1, "date": 1, "updated_at": 1}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def date_key(value: Optional[str]) -> int:
+    # "2025-01-15" -> 20250115; unparseable dates sort first
+    digits = (value or "").replace("-", "")[:8]
+    return int(digits) if digits.isdigit() and len(digits) == 8 else 0
+
+
+def _select(values: array, keep: np.ndarray) -> array:
+    return array(values.typecode, np.frombuffer(values, dtype=values.typecode)[keep].tobytes())
+
+
+class Codes:
+    """Interns repeated strings (categories, impacts, companies) as small integer codes."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+class NewsSearchIndex:
+    """In-process inverted index over news titles and descriptions with columnar facet data.
+
+    Doc ids are assigned in insertion order, so every posting list is already sorted.
+    Rewritten news items are tombstoned and re-added, and once tombstones pass
+    ``compact_ratio`` of all doc ids the survivors are renumbered in order. Only ids and
+    filter columns are kept here, result pages are hydrated from Mongo.
+    """
+
+    def __init__(self, catch_up_seconds: float = 5.0, compact_ratio: float = 0.25,
+                 retry_seconds: float = 5.0):
+        self.catch_up_seconds = catch_up_seconds
+        self.compact_ratio = compact_ratio
+        self.retry_seconds = retry_seconds
+        self.ready = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, array] = {}
+        self.title_postings: Dict[str, array] = {}
+        self.ids: List[str] = []
+        self.docid_by_id: Dict[str, int] = {}
+        self.alive = array("b")
+        self.dates = array("i")
+        self.company_codes = array("i")
+        self.facet_codes = {field: array("h") for field in FACET_FIELDS}
+        self.companies = Codes()
+        self.facets = {field: Codes() for field in FACET_FIELDS}
+        self.live_count = 0
+        self.watermark: Optional[datetime] = None
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self._caught_up_at = 0.0
+
+    def add(self, doc: Dict[str, Any]):
+        previous = self.docid_by_id.get(doc["id"])
+        if previous is not None and self.alive[previous]:
+            self.alive[previous] = 0
+            self.live_count -= 1
+        docid = len(self.ids)
+        self.ids.append(doc["id"])
+        self.docid_by_id[doc["id"]] = docid
+        self.alive.append(1)
+        self.live_count += 1
+        self.dates.append(date_key(doc.get("date")))
+        self.company_codes.append(self.companies.code(doc.get("company_name", "")))
+        for field in FACET_FIELDS:
+            self.facet_codes[field].append(self.facets[field].code(doc.get(field, "")))
+
+        title_tokens = set(tokenize(doc.get("title", "")))
+        for token in title_tokens | set(tokenize(doc.get("description", ""))):
+            self.postings.setdefault(token, array("i")).append(docid)
+        for token in title_tokens:
+            self.title_postings.setdefault(token, array("i")).append(docid)
+
+        updated_at = doc.get("updated_at")
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+        self._columns = None
+
+    def compact(self):
+        """Drops tombstoned docs, renumbering the survivors so posting lists stay sorted."""
+        keep = np.flatnonzero(np.frombuffer(self.alive, dtype="b"))
+        remap = np.full(len(self.ids), -1, dtype="i")
+        remap[keep] = np.arange(len(keep), dtype="i")
+        for postings in (self.postings, self.title_postings):
+            for token in list(postings):
+                docids = remap[np.frombuffer(postings[token], dtype="i")]
+                docids = docids[docids >= 0]
+                if len(docids):
+                    postings[token] = array("i", docids.tobytes())
+                else:
+                    del postings[token]
+        self.ids = [self.ids[i] for i in keep]
+        self.docid_by_id = {doc_id: docid for docid, doc_id in enumerate(self.ids)}
+        self.alive = array("b", bytes([1]) * len(self.ids))
+        self.dates = _select(self.dates, keep)
+        self.company_codes = _select(self.company_codes, keep)
+        self.facet_codes = {field: _select(codes, keep) for field, codes in self.facet_codes.items()}
+        self._columns = None
+
+    def _maybe_compact(self):
+        dead = len(self.ids) - self.live_count
+        if dead and dead > self.compact_ratio * len(self.ids):
+            started = time.perf_counter()
+            self.compact()
+            logger.info(f"News search index compacted: dropped {dead} stale items in {time.perf_counter() - started:.2f}s")
+
+    def start(self, collection):
+        # Large news collections take a while to index; other routes are served meanwhile
+        if self._task is None:
+            self._task = asyncio.create_task(self._build_until_ready(collection))
+            self._task.add_done_callback(self._on_build_done)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _build_until_ready(self, collection):
+        delay = self.retry_seconds
+        while True:
+            try:
+                await self.build(collection)
+                return
+            except Exception as e:
+                # Search answers 503 until a build succeeds
+                logger.error(f"News search index build failed, retrying in {delay:.0f}s: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 300.0)
+
+    def _on_build_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"News search index build stopped: {task.exception()!r}")
+
+    async def build(self, collection):
+        async with self._lock:
+            started = time.perf_counter()
+            self._reset()
+            async for doc in collection.find({}, SEARCH_FIELDS).sort("_id", 1).batch_size(10000):
+                self.add(doc)
+            self._maybe_compact()
+            self._caught_up_at = time.monotonic()
+            self.ready.set()
+            logger.info(f"News search index built: {self.live_count} items in {time.perf_counter() - started:.1f}s")
+
+    async def catch_up(self, collection, force: bool = False):
+        """Index news written since the watermark, including writes made by other processes."""
+        if not force and time.monotonic() - self._caught_up_at < self.catch_up_seconds:
+            return
+        async with self._lock:
+            # add() advances the watermark, so compare against where this scan started
+            boundary = self.watermark
+            query = {"updated_at": {"$gte": boundary}} if boundary else {"updated_at": {"$exists": True}}
+            async for doc in collection.find(query, SEARCH_FIELDS).sort("updated_at", 1).batch_size(10000):
+                # $gte re-reads the boundary instant; skip rows we already hold at that version
+                docid = self.docid_by_id.get(doc["id"])
+                if docid is not None and self.alive[docid] and boundary and doc.get("updated_at") == boundary:
+                    continue
+                self.add(doc)
+            self._maybe_compact()
+            self._caught_up_at = time.monotonic()
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        # Array snapshots are rebuilt lazily after writes, not per search
+        if self._columns is None:
+            self._columns = {
+                "alive": np.array(self.alive, dtype=bool),
+                "dates": np.array(self.dates, dtype=np.int32),
+                "company": np.array(self.company_codes, dtype=np.int32),
+                **{field: np.array(codes, dtype=np.int16) for field, codes in self.facet_codes.items()},
+            }
+        return self._columns
+
+    def search(self, q: Optional[str] = None, categories: Optional[List[str]] = None,
+               impacts: Optional[List[str]] = None, company_name: Optional[str] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               sort: str = "relevance", offset: int = 0, limit: int = 20) -> Tuple[List[str], int, Dict[str, Dict[str, int]]]:
+        columns = self.columns()
+        terms = list(dict.fromkeys(tokenize(q or "")))
+
+        if terms:
+            if any(term not in self.postings for term in terms):
+                return [], 0, {field: {} for field in FACET_FIELDS}
+            # Intersect rarest-first so the working set shrinks fastest
+            terms.sort(key=lambda term: len(self.postings[term]))
+            candidates = np.array(self.postings[terms[0]], dtype=np.int32)
+            for term in terms[1:]:
+                candidates = np.intersect1d(candidates, np.array(self.postings[term], dtype=np.int32), assume_unique=True)
+        else:
+            candidates = np.arange(len(self.ids), dtype=np.int32)
+
+        mask = columns["alive"][candidates] if terms else columns["alive"].copy()
+        for field, values in (("category", categories), ("impact", impacts)):
+            if values:
+                codes = [self.facets[field].codes[v] for v in values if v in self.facets[field].codes]
+                mask &= np.isin(columns[field][candidates], codes)
+        if company_name:
+            code = self.companies.codes.get(company_name, -1)
+            mask &= columns["company"][candidates] == code
+        if date_from:
+            mask &= columns["dates"][candidates] >= date_key(date_from)
+        if date_to:
+            mask &= columns["dates"][candidates] <= date_key(date_to)
+        matches = candidates[mask]
+
+        facets = {
+            field: {
+                self.facets[field].values[code]: int(count)
+                for code, count in enumerate(np.bincount(columns[field][matches], minlength=len(self.facets[field].values)))
+                if count
+            }
+            for field in FACET_FIELDS
+        }
+
+        # One sort key: relevance first, newest date breaking ties (dates stay below 1e8)
+        key = columns["dates"][matches].astype(np.float64)
+        if sort == "relevance" and terms:
+            scores = np.zeros(len(matches))
+            for term in terms:
+                idf = math.log(1 + self.live_count / len(self.postings[term]))
+                in_title = np.isin(matches, np.array(self.title_postings.get(term, array("i")), dtype=np.int32))
+                scores += idf * np.where(in_title, TITLE_BOOST, 1.0)
+            key += np.round(scores, 6) * 1e8
+        # Only the rows up to the requested page are fully sorted
+        k = min(offset + limit, len(matches))
+        if k == 0:
+            return [], len(matches), facets
+        top = np.argpartition(-key, k - 1)[:k] if k < len(matches) else np.arange(len(matches))
+        top = top[np.argsort(-key[top], kind="stable")]
+        page = matches[top[offset:]]
+        return [self.ids[i] for i in page], len(matches), facets
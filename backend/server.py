@@ -1,93 +1,431 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, Depends, Body, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
+from pymongo.errors import OperationFailure
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
+import json
+import asyncio
+import random
+import time
+import base64
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Callable
 import uuid
 from datetime import datetime, timezone
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from models import (
+    Company, CompanyNews, SWOTRequest, SWOTBatchRequest, SWOTResponse, TechnologyTrend, MarketSizing,
+    CompanyMetricPoint, TrendPoint, BenchmarkRequest, MarketProjectionRequest,
+)
+from swot_cache import SwotCache
+from singleflight import SingleFlight
+from indexes import ensure_indexes, verify_query_plans
+from versions import CollectionVersions, SharedVersions
+from snapshots import VersionedSnapshot
+from etags import ETags
+from fastjson import FastJSONResponse, dumps as fast_dumps
+from ingest import INGEST_TARGETS, DEFAULT_CHUNK_SIZE, aiter_lines, parse_records, ingest, summarize
+from timeseries import TimeSeriesStore, ensure_collections as ensure_timeseries_collections, parse_period
+from benchmark import BenchmarkEngine
+from similarity import SimilarityIndex
+from news_search import NewsSearchIndex
+from change_feed import TOPICS, ChangeFeed, parse_topics
+from leaderboards import Leaderboards, METRICS as LEADERBOARD_METRICS
+from market_sizing import MarketProjectionEngine, DIMENSIONS as MARKET_DIMENSIONS, rollups as market_rollups
+from database import Database
+from metrics import (
+    REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, SWOT_STAGE_SECONDS, Gauge, MetricsMiddleware,
+)
+from llm import LlmExecutor, parse_models
+from swot_context import SwotContextBuilder
+from tokenizer import load_encoding
+from swot_parser import QUADRANTS, SwotParseError, SwotStreamParser, iter_quadrants, parse_swot
+from jobs import JobQueue, JobWorkers, PermanentJobError, TERMINAL as JOB_TERMINAL
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection; opened and closed by the app lifespan
+database = Database(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+db = database.db
+# Read-only endpoints go through the configured read preference. Their ETags and caches follow
+# collection versions that move as soon as a write lands, so a lagging secondary would pin stale
+# rows under a current tag; keep them on the primary unless replication lag is known to be negligible
+read_db = database.read_db
 
-# Create the main app without a prefix
-app = FastAPI()
+# Shared LLM path: models are tried in order, each provider rate-limited and capped
+llm = LlmExecutor(
+    api_key=os.environ.get('EMERGENT_LLM_KEY'),
+    routes=parse_models(os.environ.get(
+        'LLM_MODELS', 'openai/gpt-4o-mini,anthropic/claude-3-5-haiku-20241022,gemini/gemini-2.0-flash'
+    )),
+    timeout_seconds=float(os.environ.get('LLM_TIMEOUT_SECONDS', '30')),
+    hedge_after_seconds=float(os.environ.get('LLM_HEDGE_AFTER_SECONDS', '10')),
+    requests_per_minute=float(os.environ.get('LLM_REQUESTS_PER_MINUTE', '300')),
+    burst=int(os.environ.get('LLM_BURST', '20')),
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '16')),
+    cooldown_seconds=float(os.environ.get('LLM_FAILURE_COOLDOWN_SECONDS', '30')),
+    # Past this a SWOT request stops waiting and serves the fallback
+    deadline_seconds=float(os.environ.get('LLM_DEADLINE_SECONDS', '45')),
+    # Streamed completions go to litellm directly; set when the key is issued by a proxy
+    stream_api_base=os.environ.get('LLM_STREAM_API_BASE') or None,
+)
+SWOT_SYSTEM_MESSAGE = "You are a strategic business analyst. Generate a comprehensive SWOT analysis based on company data provided."
+
+# SWOT results keyed by a hash of the prompt context
+swot_cache = SwotCache(
+    db.swot_cache,
+    max_entries=int(os.environ.get('SWOT_CACHE_MAX_ENTRIES', '512')),
+    ttl_seconds=int(os.environ.get('SWOT_CACHE_TTL_SECONDS', '86400')),
+)
+swot_flight = SingleFlight()
+
+# Bumped by every code path that writes to a collection; the shared counters keep workers in agreement
+collection_versions = CollectionVersions(
+    SharedVersions(db.collection_versions),
+    refresh_seconds=float(os.environ.get('VERSIONS_REFRESH_SECONDS', '5')),
+)
+
+# Conditional GET for read endpoints; If-None-Match is answered from the version counters alone
+etags = ETags(
+    collection_versions,
+    max_age_seconds=float(os.environ.get('ETAG_MAX_AGE_SECONDS', '60')),
+    cache_control=os.environ.get('READ_CACHE_CONTROL', 'no-cache'),
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Define Models
-class Company(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+# Keyset pagination
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '1000'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '5000'))
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+
+# Sort keys must end with a unique field so the cursor position is unambiguous
+COMPANY_SORT: List[Tuple[str, int]] = [("name", 1), ("id", 1)]
+NEWS_SORT: List[Tuple[str, int]] = [("date", -1), ("id", -1)]
+
+def encode_cursor(doc: Dict[str, Any], sort: List[Tuple[str, int]]) -> str:
+    values = [doc.get(field) for field, _ in sort]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def keyset_query(query: Dict[str, Any], sort: List[Tuple[str, int]], after: Optional[str]) -> Dict[str, Any]:
+    if not after:
+        return query
+    values = decode_cursor(after, sort)
+    # (a, b) > (x, y)  <=>  a > x OR (a == x AND b > y)
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: values[j] for j, (f, _) in enumerate(sort[:i])}
+        clause[field] = {"$gt" if direction == 1 else "$lt": values[i]}
+        clauses.append(clause)
+    keyset = {"$or": clauses}
+    return {"$and": [query, keyset]} if query else keyset
+
+# Field selection
+def parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+# Bookkeeping stored alongside documents (ingest stamps updated_at) that is not part of any model
+RESPONSE_PROJECTION = {"_id": 0, "updated_at": 0}
+
+def projection_for(fields: Optional[List[str]], extra: Iterable[str] = ()) -> Dict[str, int]:
+    if not fields:
+        return dict(RESPONSE_PROJECTION)
+    projection = {name: 1 for name in fields}
+    projection.update({name: 1 for name in extra})
+    projection["_id"] = 0
+    return projection
+
+# Documents are validated against their model when written, so reads may skip
+# per-row response_model validation. Partial (fields=) reads always take this path.
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+
+def response_headers(response: Response) -> Dict[str, str]:
+    # Headers set by dependencies (ETag, Cache-Control) for responses built by hand
+    return {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+
+def encoded_response(docs: Any, response: Response) -> FastJSONResponse:
+    return FastJSONResponse(content=docs, headers=response_headers(response))
+
+def validate_documents(model, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [model.model_validate(doc).model_dump() for doc in docs]
+
+async def fetch_page(collection, query: Dict[str, Any], sort: List[Tuple[str, int]],
+                     limit: int, after: Optional[str], response: Response,
+                     fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    # Sort keys are always read so the next cursor can be built from the last row
+    sort_fields = [field for field, _ in sort]
+    projection = projection_for(fields, sort_fields)
+    # Read one extra row to learn whether another page exists
+    cursor = collection.find(keyset_query(query, sort, after), projection).sort(sort).limit(limit + 1)
+    docs = await cursor.to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1], sort)
+    if fields:
+        unrequested = [field for field in sort_fields if field not in fields]
+        for doc in docs:
+            for field in unrequested:
+                doc.pop(field, None)
+    return docs
+
+def stream_ndjson(collection, query: Dict[str, Any], sort: List[Tuple[str, int]],
+                  limit: Optional[int], after: Optional[str],
+                  fields: Optional[List[str]] = None,
+                  headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    cursor = collection.find(keyset_query(query, sort, after), projection_for(fields)).sort(sort).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    async def generate():
+        try:
+            async for doc in cursor:
+                yield fast_dumps(doc) + b"\n"
+        finally:
+            await cursor.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers=headers)
+
+# SWOT generation
+SSE_KEEPALIVE_SECONDS = float(os.environ.get('SSE_KEEPALIVE_SECONDS', '15'))
+
+SWOT_BATCH_CONCURRENCY = int(os.environ.get('SWOT_BATCH_CONCURRENCY', '8'))
+SWOT_BATCH_MAX_ATTEMPTS = int(os.environ.get('SWOT_BATCH_MAX_ATTEMPTS', '3'))
+SWOT_BATCH_BACKOFF_SECONDS = float(os.environ.get('SWOT_BATCH_BACKOFF_SECONDS', '1.0'))
+# The newest candidates are ranked by impact and recency, then trimmed to the token budget
+SWOT_NEWS_CANDIDATES = int(os.environ.get('SWOT_NEWS_CANDIDATES', '50'))
+swot_context_builder = SwotContextBuilder(
+    token_budget=int(os.environ.get('SWOT_CONTEXT_TOKEN_BUDGET', '1200')),
+    half_life_days=float(os.environ.get('SWOT_NEWS_HALF_LIFE_DAYS', '90')),
+    duplicate_threshold=float(os.environ.get('SWOT_NEWS_DUPLICATE_THRESHOLD', '0.6')),
+    max_item_tokens=int(os.environ.get('SWOT_NEWS_ITEM_MAX_TOKENS', '80')),
+)
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def build_swot_context(company: Dict[str, Any], news_items: List[Dict[str, Any]]) -> str:
+    context, stats = swot_context_builder.build(company, news_items)
+    logger.debug(f"SWOT context for {company['name']}: {stats}")
+    return context
+
+def build_swot_message(context: str) -> str:
+    return f"""{context}
+
+Based on this information, generate a SWOT analysis with exactly 4 items in each category (Strengths, Weaknesses, Opportunities, Threats).
+Return the response in JSON format:
+{{
+  "strengths": ["item1", "item2", "item3", "item4"],
+  "weaknesses": ["item1", "item2", "item3", "item4"],
+  "opportunities": ["item1", "item2", "item3", "item4"],
+  "threats": ["item1", "item2", "item3", "item4"]
+}}
+"""
+
+def parse_swot_response(response: str) -> Tuple[Dict[str, List[str]], bool]:
+    # Tolerates fences, prose, trailing commas and truncation; raises only when nothing is usable
+    try:
+        quadrants, complete = parse_swot(response)
+    except SwotParseError:
+        logger.warning(f"Unparseable SWOT response: {response[:200]!r}")
+        raise
+    if not complete:
+        logger.warning(f"Incomplete SWOT response: ...{response[-200:]!r}")
+    return quadrants, complete
+
+def fallback_swot(company: Dict[str, Any]) -> Dict[str, List[str]]:
+    return {
+        "strengths": [
+            f"Strong market position with {company['market_share']}% market share",
+            f"High innovation score ({company['innovation_score']}/10)",
+            f"Strong execution capabilities ({company['execution_score']}/10)",
+            f"Global presence in {company['global_presence']} countries"
+        ],
+        "weaknesses": [
+            "Areas for improvement in emerging technologies",
+            "Competition from agile startups",
+            "Talent acquisition challenges",
+            "Legacy system integration complexities"
+        ],
+        "opportunities": [
+            "Growing demand for AI and cloud services",
+            "Expansion into emerging markets",
+            "Strategic partnerships and acquisitions",
+            "New service line development"
+        ],
+        "threats": [
+            "Intense competition in consulting market",
+            "Rapid technological disruption",
+            "Economic uncertainty and budget constraints",
+            "Cybersecurity and data privacy concerns"
+        ]
+    }
+
+async def load_swot_context(company_name: str) -> Tuple[Dict[str, Any], str, str]:
+    with SWOT_STAGE_SECONDS.time("load"):
+        # Get company data
+        company = await db.companies.find_one({"name": company_name}, {"_id": 0})
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+        
+        # Get recent news for the company
+        news_items = await db.news.find({"company_name": company_name}, {"_id": 0}).sort(NEWS_SORT).to_list(SWOT_NEWS_CANDIDATES)
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    name: str
-    revenue: float  # in billions
-    yoy_growth: float  # percentage
-    consulting_mix: float  # percentage
-    tech_services_mix: float  # percentage
-    global_presence: int  # number of countries
-    key_services: List[str]
-    major_clients: List[str]
-    ai_adoption: float  # score 1-10
-    cloud_adoption: float  # score 1-10
-    cybersecurity_adoption: float  # score 1-10
-    analytics_adoption: float  # score 1-10
-    innovation_score: float  # score 1-10
-    execution_score: float  # score 1-10
-    market_share: float  # percentage
-
-class CompanyNews(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    with SWOT_STAGE_SECONDS.time("prompt"):
+        context = build_swot_context(company, news_items)
+        # Company or news changes alter the context, so stale entries are never hit
+        cache_key = SwotCache.make_key(llm.primary, context)
+    return company, context, cache_key
+
+async def load_swot_contexts(company_names: List[str]) -> Dict[str, Tuple[Dict[str, Any], str, str]]:
+    with SWOT_STAGE_SECONDS.time("load_batch"):
+        try:
+            # One round trip; each company's news is a bounded walk of company_name_date_id
+            companies = await db.companies.aggregate([
+                {"$match": {"name": {"$in": company_names}}},
+                {"$lookup": {
+                    "from": "news",
+                    "localField": "name",
+                    "foreignField": "company_name",
+                    "pipeline": [{"$sort": dict(NEWS_SORT)}, {"$limit": SWOT_NEWS_CANDIDATES}, {"$project": {"_id": 0}}],
+                    "as": "news",
+                }},
+                {"$project": {"_id": 0}},
+            ]).to_list(None)
+            news_by_company = {c["name"]: c.pop("news") for c in companies}
+        except (OperationFailure, NotImplementedError) as e:
+            # Pre-5.0 servers and in-memory stand-ins: one indexed, limited query per company
+            logger.warning(f"Batch news lookup unavailable, querying per company: {str(e)}")
+            companies = await db.companies.find({"name": {"$in": company_names}}, {"_id": 0}).to_list(None)
+            latest = await asyncio.gather(*(
+                db.news.find({"company_name": c["name"]}, {"_id": 0}).sort(NEWS_SORT).to_list(SWOT_NEWS_CANDIDATES)
+                for c in companies
+            ))
+            news_by_company = {c["name"]: items for c, items in zip(companies, latest)}
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    company_name: str
-    title: str
-    description: str
-    category: str  # Innovation, Risk, Talent, Finance, Customer
-    date: str
-    impact: str  # High, Medium, Low
-
-class SWOTRequest(BaseModel):
-    company_name: str
-
-class SWOTResponse(BaseModel):
-    company_name: str
-    strengths: List[str]
-    weaknesses: List[str]
-    opportunities: List[str]
-    threats: List[str]
-
-class TechnologyTrend(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    contexts = {}
+    with SWOT_STAGE_SECONDS.time("prompt_batch"):
+        for company in companies:
+            context = build_swot_context(company, news_by_company.get(company["name"], []))
+            cache_key = SwotCache.make_key(llm.primary, context)
+            contexts[company["name"]] = (company, context, cache_key)
+    return contexts
+
+async def with_retries(fn, attempts: int, base_delay: float):
+    for attempt in range(1, attempts + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            delay = base_delay * 2 ** (attempt - 1) * (0.5 + random.random())
+            logger.warning(f"Attempt {attempt}/{attempts} failed ({str(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def run_swot_llm(company: Dict[str, Any], context: str, cache_key: str) -> Tuple[Dict[str, List[str]], bool]:
+    company_name = company["name"]
+    # Another flight may have filled the cache between our lookup and joining
+    cached = await swot_cache.get(cache_key)
+    if cached:
+        return cached, True
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    technology: str
-    adoption_rate: float  # percentage
-    growth_rate: float  # percentage
-    market_size: float  # in billions
-    year: int
-
-class MarketSizing(BaseModel):
-    model_config = ConfigDict(extra="ignore")
+    result = await llm.complete(SWOT_SYSTEM_MESSAGE, build_swot_message(context), session_id=f"swot-{company_name}")
+    logger.info(
+        f"SWOT for {company_name} via {result.provider}/{result.model}: {result.prompt_tokens} prompt tokens, "
+        f"{result.completion_tokens} completion tokens, {result.latency_seconds:.2f}s"
+    )
+    with SWOT_STAGE_SECONDS.time("parse"):
+        quadrants, complete = parse_swot_response(result.text)
+    return await settle_swot(company, cache_key, quadrants, complete)
+
+async def stream_swot_llm(company: Dict[str, Any], context: str, cache_key: str,
+                          on_quadrant: Callable[[str, List[str]], None]) -> Tuple[Dict[str, List[str]], bool]:
+    # Same contract as run_swot_llm, but each quadrant is handed over as soon as its list closes
+    company_name = company["name"]
+    cached = await swot_cache.get(cache_key)
+    if cached:
+        return cached, True
     
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    segment: str
-    tam: float  # Total Addressable Market in billions
-    sam: float  # Serviceable Available Market in billions
-    som: float  # Serviceable Obtainable Market in billions
-    region: str
-    industry: str
-    growth_projection: float  # percentage
+    parser = SwotStreamParser()
+    chunks = llm.stream(SWOT_SYSTEM_MESSAGE, build_swot_message(context), session_id=f"swot-{company_name}")
+    async for name, items in iter_quadrants(chunks, parser):
+        on_quadrant(name, items)
+    quadrants = {name: parser.quadrants.get(name, []) for name in QUADRANTS}
+    if not parser.complete:
+        logger.warning(f"Incomplete streamed SWOT for {company_name}")
+    return await settle_swot(company, cache_key, quadrants, parser.complete)
+
+async def settle_swot(company: Dict[str, Any], cache_key: str, quadrants: Dict[str, List[str]],
+                      complete: bool) -> Tuple[Dict[str, List[str]], bool]:
+    if not complete:
+        # Served with the gaps filled but never cached, so the next request asks again
+        fallback = fallback_swot(company)
+        return {name: items or fallback[name] for name, items in quadrants.items()}, False
+    await swot_cache.set(cache_key, company["name"], quadrants)
+    return quadrants, True
+
+# Background jobs: LLM work queued in Mongo, leased to workers in any app process
+job_queue = JobQueue(
+    db.jobs,
+    lease_seconds=float(os.environ.get('JOB_LEASE_SECONDS', '60')),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', '3')),
+    backoff_seconds=float(os.environ.get('JOB_BACKOFF_SECONDS', '5')),
+    retention_seconds=int(os.environ.get('JOB_RETENTION_SECONDS', '86400')),
+    poll_seconds=float(os.environ.get('JOB_POLL_SECONDS', '1')),
+)
+
+async def run_swot_job(job_input: Dict[str, Any]) -> Dict[str, Any]:
+    company_name = job_input["company_name"]
+    try:
+        company, context, cache_key = await load_swot_context(company_name)
+    except HTTPException as e:
+        raise PermanentJobError(e.detail)
+    # Shares the flight with synchronous /swot callers asking for the same context
+    quadrants, complete = await swot_flight.do(cache_key, lambda: run_swot_llm(company, context, cache_key))
+    if not complete:
+        # A deduplicated job result outlives the request, so retry rather than keep a partial one
+        raise RuntimeError("LLM returned an incomplete SWOT")
+    return {"company_name": company_name, **quadrants}
+
+# API-only processes set JOB_WORKERS=0 and leave the queue to others
+job_workers = JobWorkers(
+    job_queue,
+    {"swot": run_swot_job},
+    concurrency=int(os.environ.get('JOB_WORKERS', '4')),
+)
+
+# Query shapes checked against the index plan at startup
+HOT_QUERIES = [
+    ("companies", {"name": "Deloitte"}, []),
+    ("companies", {}, COMPANY_SORT),
+    ("news", {}, NEWS_SORT),
+    ("news", {"company_name": "Deloitte"}, NEWS_SORT),
+    ("trends", {"technology": "Cloud Computing", "year": 2025}, []),
+    ("market_sizing", {"region": "Global", "industry": "All Industries"}, []),
+    # Change feed polling, every few seconds in every worker on standalone servers
+    *[(topic, {"updated_at": {"$gte": datetime(2024, 1, 1, tzinfo=timezone.utc)}}, [("updated_at", 1)]) for topic in TOPICS],
+]
+VERIFY_QUERY_PLANS = os.environ.get('VERIFY_QUERY_PLANS', 'true').lower() == 'true'
 
 # Initialize database with mock data
 async def initialize_mock_data():
@@ -279,7 +617,7 @@ async def initialize_mock_data():
             "market_share": 4.9
         }
     ]
-    await db.companies.insert_many(companies)
+    await db.companies.insert_many(validate_documents(Company, companies))
     
     # Mock news data
     news = [
@@ -374,7 +712,7 @@ async def initialize_mock_data():
             "impact": "Medium"
         }
     ]
-    await db.news.insert_many(news)
+    await db.news.insert_many(validate_documents(CompanyNews, news))
     
     # Mock technology trends
     trends = [
@@ -385,7 +723,7 @@ async def initialize_mock_data():
         {"id": str(uuid.uuid4()), "technology": "IoT", "adoption_rate": 68.4, "growth_rate": 28.5, "market_size": 520.6, "year": 2025},
         {"id": str(uuid.uuid4()), "technology": "Blockchain", "adoption_rate": 42.1, "growth_rate": 67.3, "market_size": 67.4, "year": 2025}
     ]
-    await db.trends.insert_many(trends)
+    await db.trends.insert_many(validate_documents(TechnologyTrend, trends))
     
     # Mock market sizing data
     market_data = [
@@ -430,166 +768,524 @@ async def initialize_mock_data():
             "growth_projection": 12.4
         }
     ]
-    await db.market_sizing.insert_many(market_data)
+    await db.market_sizing.insert_many(validate_documents(MarketSizing, market_data))
+    await collection_versions.record_write("companies", "news", "trends", "market_sizing")
+
+# Rankings and positioning quadrants, kept in memory and updated per company write
+leaderboards = Leaderboards(
+    quadrant_threshold=float(os.environ.get('QUADRANT_THRESHOLD', '8')),
+    max_age_seconds=float(os.environ.get('LEADERBOARDS_MAX_AGE_SECONDS', '60')),
+)
+LEADERBOARD_SIZE = 3
+POSITIONING_FIELDS = ["name", "innovation_score", "execution_score", "market_share", "yoy_growth"]
+
+async def apply_ingest_side_effects(collection_name: str, docs: List[Dict[str, Any]]):
+    if not docs:
+        return
+    await collection_versions.record_write(collection_name)
+    if collection_name == "companies":
+        for doc in docs:
+            leaderboards.upsert(doc)
+        await swot_cache.invalidate_companies(doc["name"] for doc in docs)
+    elif collection_name == "news":
+        await swot_cache.invalidate_companies(doc["company_name"] for doc in docs)
+        if news_search.ready.is_set():
+            await news_search.catch_up(db.news, force=True)
+
+# Quarterly company metrics and yearly trend points with precomputed rollups
+timeseries = TimeSeriesStore(db)
+MAX_TIMESERIES_POINTS = 10000
+
+# Columnar company metrics for peer benchmarks, reloaded when companies change
+benchmark_engine = BenchmarkEngine(
+    max_age_seconds=float(os.environ.get('BENCHMARK_MAX_AGE_SECONDS', '60')),
+)
+
+# Capability vectors for nearest-competitor search, reloaded when companies change
+similarity_index = SimilarityIndex(
+    hash_dims=int(os.environ.get('SIMILARITY_HASH_DIMS', '64')),
+    text_weight=float(os.environ.get('SIMILARITY_TEXT_WEIGHT', '0.5')),
+    max_age_seconds=float(os.environ.get('SIMILARITY_MAX_AGE_SECONDS', '60')),
+)
+
+# Columnar market sizing rows for what-if projections, reloaded when market_sizing changes
+market_projections = MarketProjectionEngine(
+    max_entries=int(os.environ.get('MARKET_PROJECTION_CACHE_ENTRIES', '1024')),
+    max_age_seconds=float(os.environ.get('MARKET_PROJECTION_MAX_AGE_SECONDS', '60')),
+)
+
+# Inverted index for news search; built at startup and caught up from updated_at
+news_search = NewsSearchIndex(
+    catch_up_seconds=float(os.environ.get('NEWS_SEARCH_CATCH_UP_SECONDS', '5')),
+    compact_ratio=float(os.environ.get('NEWS_SEARCH_COMPACT_RATIO', '0.25')),
+    retry_seconds=float(os.environ.get('NEWS_SEARCH_RETRY_SECONDS', '5')),
+)
+NEWS_SEARCH_READY_TIMEOUT_SECONDS = 30
+
+def apply_feed_document(topic: str, doc: Dict[str, Any]):
+    # Picks up company writes made by other workers without waiting for the periodic reload
+    if topic == "companies":
+        try:
+            leaderboards.upsert(doc)
+        except KeyError as e:
+            logger.warning(f"Skipping leaderboard update for company without {e}")
+
+# Live per-document changes for dashboard clients; also keeps local caches current across workers
+change_feed = ChangeFeed(
+    db,
+    poll_seconds=float(os.environ.get('CHANGE_FEED_POLL_SECONDS', '2')),
+    max_pending=int(os.environ.get('CHANGE_FEED_MAX_PENDING', '1000')),
+    on_change=collection_versions.note_change,
+    on_document=apply_feed_document,
+)
+
+# Dashboard snapshot
+async def build_dashboard_snapshot() -> Dict[str, Any]:
+    await leaderboards.refresh(db.companies)
+    companies, news, trends, market_data, market_totals = await asyncio.gather(
+        db.companies.find({}, RESPONSE_PROJECTION).sort(COMPANY_SORT).to_list(DEFAULT_PAGE_SIZE),
+        db.news.find({}, RESPONSE_PROJECTION).sort(NEWS_SORT).to_list(DEFAULT_PAGE_SIZE),
+        db.trends.find({}, RESPONSE_PROJECTION).to_list(DEFAULT_PAGE_SIZE),
+        db.market_sizing.find({}, RESPONSE_PROJECTION).to_list(DEFAULT_PAGE_SIZE),
+        market_rollups(db.market_sizing),
+    )
+    return {
+        "companies": companies,
+        "news": news,
+        "trends": trends,
+        "market_sizing": market_data,
+        "market_rollups": market_totals,
+        "leaderboards": leaderboards.snapshot(LEADERBOARD_SIZE),
+    }
+
+dashboard_snapshot = VersionedSnapshot(
+    collection_versions,
+    ["companies", "news", "trends", "market_sizing"],
+    build_dashboard_snapshot,
+    max_age_seconds=float(os.environ.get('DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS', '60')),
+    name="dashboard_snapshot",
+)
 
 # Routes
 @api_router.get("/")
 async def root():
     return {"message": "Competitive Intelligence Dashboard API"}
 
-@api_router.get("/companies", response_model=List[Company])
-async def get_companies():
-    companies = await db.companies.find({}, {"_id": 0}).to_list(1000)
-    return companies
+@api_router.get("/health/db")
+async def get_db_health(response: Response):
+    health = await database.health()
+    if health["status"] != "ok":
+        response.status_code = 503
+    return health
 
-@api_router.get("/companies/{company_name}", response_model=Company)
-async def get_company(company_name: str):
-    company = await db.companies.find_one({"name": company_name}, {"_id": 0})
+@api_router.get("/dashboard")
+async def get_dashboard(
+    etag_headers: Dict[str, str] = Depends(etags.dependency("companies", "news", "trends", "market_sizing")),
+):
+    return Response(content=await dashboard_snapshot.get(), media_type="application/json", headers=etag_headers)
+
+@api_router.get("/companies", response_model=List[Company], dependencies=[Depends(etags.dependency("companies"))])
+async def get_companies(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, Company)
+    if stream:
+        return stream_ndjson(read_db.companies, {}, COMPANY_SORT, limit, after, selected, response_headers(response))
+    companies = await fetch_page(read_db.companies, {}, COMPANY_SORT, limit or DEFAULT_PAGE_SIZE, after, response, selected)
+    return encoded_response(companies, response) if selected or FAST_JSON_RESPONSES else companies
+
+@api_router.get("/companies/{company_name}", response_model=Company, dependencies=[Depends(etags.dependency("companies"))])
+async def get_company(company_name: str, response: Response, fields: Optional[str] = None):
+    selected = parse_fields(fields, Company)
+    company = await read_db.companies.find_one({"name": company_name}, projection_for(selected))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    return company
+    return encoded_response(company, response) if selected or FAST_JSON_RESPONSES else company
 
-@api_router.get("/news", response_model=List[CompanyNews])
-async def get_news(company_name: Optional[str] = None):
+@api_router.get("/companies/{company_name}/similar", dependencies=[Depends(etags.dependency("companies"))])
+async def get_similar_companies(company_name: str, k: int = Query(5, ge=1, le=100)):
+    await similarity_index.refresh(db.companies, collection_versions.get("companies"))
+    similar = similarity_index.similar(company_name, k)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return {"company_name": company_name, "similar": similar}
+
+@api_router.get("/news/search")
+async def search_news(
+    q: Optional[str] = None,
+    category: Optional[List[str]] = Query(None),
+    impact: Optional[List[str]] = Query(None),
+    company_name: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort: str = Query("relevance", pattern="^(relevance|date)$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    try:
+        await asyncio.wait_for(news_search.ready.wait(), NEWS_SEARCH_READY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="News search index is still building")
+    await news_search.catch_up(db.news)
+    ids, total, facets = news_search.search(
+        q, category, impact, company_name, date_from, date_to, sort, offset, limit
+    )
+    # Hydrate just the page from Mongo, keeping the index's ordering
+    docs = await db.news.find({"id": {"$in": ids}}, RESPONSE_PROJECTION).to_list(len(ids))
+    by_id = {doc["id"]: doc for doc in docs}
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "results": [CompanyNews(**by_id[i]).model_dump() for i in ids if i in by_id],
+        "facets": facets,
+    }
+
+@api_router.get("/news", response_model=List[CompanyNews], dependencies=[Depends(etags.dependency("news"))])
+async def get_news(
+    response: Response,
+    company_name: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    stream: bool = False,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, CompanyNews)
     query = {"company_name": company_name} if company_name else {}
-    news = await db.news.find(query, {"_id": 0}).to_list(1000)
-    return news
+    if stream:
+        return stream_ndjson(read_db.news, query, NEWS_SORT, limit, after, selected, response_headers(response))
+    news = await fetch_page(read_db.news, query, NEWS_SORT, limit or DEFAULT_PAGE_SIZE, after, response, selected)
+    return encoded_response(news, response) if selected or FAST_JSON_RESPONSES else news
 
 @api_router.post("/swot", response_model=SWOTResponse)
 async def generate_swot(request: SWOTRequest):
-    # Get company data
-    company = await db.companies.find_one({"name": request.company_name}, {"_id": 0})
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-    
-    # Get recent news for the company
-    news_items = await db.news.find({"company_name": request.company_name}, {"_id": 0}).to_list(10)
-    
-    # Prepare context for AI
-    context = f"""
-Company: {company['name']}
-Revenue: ${company['revenue']}B
-YoY Growth: {company['yoy_growth']}%
-Market Share: {company['market_share']}%
-Key Services: {', '.join(company['key_services'])}
-AI Adoption Score: {company['ai_adoption']}/10
-Cloud Adoption Score: {company['cloud_adoption']}/10
-Innovation Score: {company['innovation_score']}/10
-Execution Score: {company['execution_score']}/10
-
-Recent News:
-"""
-    for news in news_items:
-        context += f"- {news['title']}: {news['description']}\n"
+    company, context, cache_key = await load_swot_context(request.company_name)
+    cached = await swot_cache.get(cache_key)
+    if cached:
+        return SWOTResponse(company_name=request.company_name, **cached)
     
-    # Generate SWOT using AI
+    # Generate SWOT using AI; concurrent requests for the same context share one call
     try:
-        chat = LlmChat(
-            api_key=os.environ['EMERGENT_LLM_KEY'],
-            session_id=f"swot-{request.company_name}",
-            system_message="You are a strategic business analyst. Generate a comprehensive SWOT analysis based on company data provided."
-        ).with_model("openai", "gpt-4o-mini")
-        
-        message = UserMessage(
-            text=f"""{context}
+        quadrants, _ = await swot_flight.do(cache_key, lambda: run_swot_llm(company, context, cache_key))
+        return SWOTResponse(company_name=request.company_name, **quadrants)
+    except Exception as e:
+        logger.error(f"Error generating SWOT: {str(e)}")
+        # Fallback to basic SWOT
+        return SWOTResponse(company_name=request.company_name, **fallback_swot(company))
 
-Based on this information, generate a SWOT analysis with exactly 4 items in each category (Strengths, Weaknesses, Opportunities, Threats).
-Return the response in JSON format:
-{{
-  "strengths": ["item1", "item2", "item3", "item4"],
-  "weaknesses": ["item1", "item2", "item3", "item4"],
-  "opportunities": ["item1", "item2", "item3", "item4"],
-  "threats": ["item1", "item2", "item3", "item4"]
-}}
-"""
-        )
+@api_router.get("/swot/stream")
+async def stream_swot(company_name: str):
+    # Resolve the company before streaming starts so a missing one is still a 404
+    company, context, cache_key = await load_swot_context(company_name)
+    
+    async def events():
+        yield sse_event("meta", {"company_name": company_name})
         
-        response = await chat.send_message(message)
+        quadrants = await swot_cache.get(cache_key)
+        cached = complete = quadrants is not None
+        sent: Dict[str, List[str]] = {}
+        if not cached:
+            arrived: List[Tuple[str, List[str]]] = []
+            signal = asyncio.Event()
+            
+            def on_quadrant(name: str, items: List[str]):
+                arrived.append((name, items))
+                signal.set()
+            
+            # Joining a flight someone else started yields only its final result
+            task = asyncio.ensure_future(
+                swot_flight.do(cache_key, lambda: stream_swot_llm(company, context, cache_key, on_quadrant))
+            )
+            try:
+                while True:
+                    signal.clear()
+                    while arrived:
+                        name, items = arrived.pop(0)
+                        sent[name] = items
+                        yield sse_event("quadrant", {"name": name, "items": items})
+                    if task.done():
+                        break
+                    waiter = asyncio.ensure_future(signal.wait())
+                    done, _ = await asyncio.wait({task, waiter}, timeout=SSE_KEEPALIVE_SECONDS,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                    if not done:
+                        yield ": keep-alive\n\n"
+                quadrants, complete = task.result()
+            except Exception as e:
+                logger.error(f"Error generating SWOT: {str(e)}")
+                if not sent:
+                    yield sse_event("fallback", {"company_name": company_name, **fallback_swot(company)})
+                    yield sse_event("done", {"cached": False, "fallback": True})
+                    return
+                # Keep what the client already shows and fill the rest
+                fallback = fallback_swot(company)
+                quadrants, complete = {name: sent.get(name) or fallback[name] for name in QUADRANTS}, False
+            finally:
+                # The shared flight is shielded, so this only drops our interest in it
+                if not task.done():
+                    task.cancel()
         
-        # Parse AI response
-        import json
-        # Extract JSON from response
-        response_text = response.strip()
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0]
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0]
+        for name, items in quadrants.items():
+            if sent.get(name) != items:
+                yield sse_event("quadrant", {"name": name, "items": items})
+        # Partial results had their missing quadrants filled from the fallback
+        yield sse_event("done", {"cached": cached, "fallback": False, "partial": not complete})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.post("/swot/batch")
+async def generate_swot_batch(request: SWOTBatchRequest):
+    company_names = list(dict.fromkeys(request.company_names))
+    contexts = await load_swot_contexts(company_names)
+    semaphore = asyncio.Semaphore(SWOT_BATCH_CONCURRENCY)
+    
+    async def generate_one(company_name: str) -> Dict[str, Any]:
+        if company_name not in contexts:
+            return {"company_name": company_name, "status": "not_found"}
+        company, context, cache_key = contexts[company_name]
+        cached = await swot_cache.get(cache_key)
+        if cached:
+            return {"company_name": company_name, "status": "cached", **cached}
         
-        swot_data = json.loads(response_text)
+        async def call_llm():
+            async with semaphore:
+                return await with_retries(
+                    lambda: run_swot_llm(company, context, cache_key),
+                    SWOT_BATCH_MAX_ATTEMPTS,
+                    SWOT_BATCH_BACKOFF_SECONDS,
+                )
         
-        return SWOTResponse(
-            company_name=request.company_name,
-            strengths=swot_data.get("strengths", []),
-            weaknesses=swot_data.get("weaknesses", []),
-            opportunities=swot_data.get("opportunities", []),
-            threats=swot_data.get("threats", [])
-        )
-    except Exception as e:
-        logger.error(f"Error generating SWOT: {str(e)}")
-        # Fallback to basic SWOT
-        return SWOTResponse(
-            company_name=request.company_name,
-            strengths=[
-                f"Strong market position with {company['market_share']}% market share",
-                f"High innovation score ({company['innovation_score']}/10)",
-                f"Strong execution capabilities ({company['execution_score']}/10)",
-                f"Global presence in {company['global_presence']} countries"
-            ],
-            weaknesses=[
-                "Areas for improvement in emerging technologies",
-                "Competition from agile startups",
-                "Talent acquisition challenges",
-                "Legacy system integration complexities"
-            ],
-            opportunities=[
-                "Growing demand for AI and cloud services",
-                "Expansion into emerging markets",
-                "Strategic partnerships and acquisitions",
-                "New service line development"
-            ],
-            threats=[
-                "Intense competition in consulting market",
-                "Rapid technological disruption",
-                "Economic uncertainty and budget constraints",
-                "Cybersecurity and data privacy concerns"
-            ]
-        )
+        try:
+            quadrants, complete = await swot_flight.do(cache_key, call_llm)
+            return {"company_name": company_name, "status": "generated" if complete else "partial", **quadrants}
+        except Exception as e:
+            logger.error(f"Error generating SWOT for {company_name}: {str(e)}")
+            return {"company_name": company_name, "status": "fallback", **fallback_swot(company)}
+    
+    async def results():
+        tasks = [asyncio.ensure_future(generate_one(name)) for name in company_names]
+        try:
+            # One NDJSON line per company, in completion order
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
-@api_router.get("/trends", response_model=List[TechnologyTrend])
-async def get_trends():
-    trends = await db.trends.find({}, {"_id": 0}).to_list(1000)
-    return trends
+@api_router.post("/jobs/swot", status_code=202)
+async def enqueue_swot_job(request: SWOTRequest, response: Response):
+    # The input hash is the SWOT cache key, so a resubmission only runs again once
+    # the company or its news changed
+    _, _, cache_key = await load_swot_context(request.company_name)
+    job, created = await job_queue.enqueue("swot", {"company_name": request.company_name}, cache_key)
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return {**job, "deduplicated": not created}
 
-@api_router.get("/market-sizing", response_model=List[MarketSizing])
-async def get_market_sizing():
-    market_data = await db.market_sizing.find({}, {"_id": 0}).to_list(1000)
-    return market_data
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-@api_router.get("/positioning")
+@api_router.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        current = job
+        yield sse_event("status", current)
+        while current["status"] not in JOB_TERMINAL:
+            updated = await job_queue.wait_for_change(job_id, current["updated_at"], SSE_KEEPALIVE_SECONDS)
+            if updated is None:
+                # Expired and removed while we watched
+                yield sse_event("done", {"id": job_id, "status": "expired"})
+                return
+            if updated["updated_at"] == current["updated_at"]:
+                yield ": keep-alive\n\n"
+                continue
+            current = updated
+            yield sse_event("status", current)
+        yield sse_event("done", {"id": job_id, "status": current["status"]})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/trends", response_model=List[TechnologyTrend], dependencies=[Depends(etags.dependency("trends"))])
+async def get_trends(response: Response, fields: Optional[str] = None):
+    selected = parse_fields(fields, TechnologyTrend)
+    trends = await read_db.trends.find({}, projection_for(selected)).to_list(1000)
+    return encoded_response(trends, response) if selected or FAST_JSON_RESPONSES else trends
+
+@api_router.get("/market-sizing", response_model=List[MarketSizing], dependencies=[Depends(etags.dependency("market_sizing"))])
+async def get_market_sizing(response: Response):
+    market_data = await read_db.market_sizing.find({}, RESPONSE_PROJECTION).to_list(1000)
+    return encoded_response(market_data, response) if FAST_JSON_RESPONSES else market_data
+
+@api_router.get("/market-sizing/rollups", dependencies=[Depends(etags.dependency("market_sizing"))])
+async def get_market_rollups(
+    region: Optional[List[str]] = Query(None),
+    industry: Optional[List[str]] = Query(None),
+    segment: Optional[List[str]] = Query(None),
+):
+    filters = dict(zip(MARKET_DIMENSIONS, (region, industry, segment)))
+    match = {dimension: {"$in": values} for dimension, values in filters.items() if values}
+    return await market_rollups(read_db.market_sizing, match)
+
+@api_router.post("/market-sizing/projections")
+async def project_market_sizing(request: MarketProjectionRequest):
+    await market_projections.refresh(db.market_sizing, collection_versions.get("market_sizing"))
+    scenarios = market_projections.project(
+        [scenario.model_dump() for scenario in request.scenarios], request.years, request.group_by
+    )
+    return FastJSONResponse(content={"years": request.years, "scenarios": scenarios})
+
+@api_router.get("/leaderboards", dependencies=[Depends(etags.dependency("companies"))])
+async def get_leaderboards(
+    n: int = Query(LEADERBOARD_SIZE, ge=1, le=100),
+    metric: Optional[str] = None,
+):
+    if metric is not None and metric not in LEADERBOARD_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(LEADERBOARD_METRICS)}")
+    await leaderboards.refresh(db.companies)
+    if metric:
+        return {"metric": metric, "top": leaderboards.top(metric, n)}
+    return leaderboards.snapshot(n)
+
+@api_router.get("/positioning", dependencies=[Depends(etags.dependency("companies"))])
 async def get_positioning_data():
-    companies = await db.companies.find({}, {"_id": 0}).to_list(1000)
-    return [
-        {
-            "name": c["name"],
-            "innovation_score": c["innovation_score"],
-            "execution_score": c["execution_score"],
-            "market_share": c["market_share"],
-            "yoy_growth": c["yoy_growth"]
-        }
-        for c in companies
-    ]
+    # Only the plotted scalars leave Mongo; key_services/major_clients stay behind
+    return await read_db.companies.find({}, projection_for(POSITIONING_FIELDS)).to_list(1000)
 
-# Include the router in the main app
-app.include_router(api_router)
+@api_router.post("/ingest/{collection_name}")
+async def ingest_collection(
+    collection_name: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=50000),
+):
+    target = INGEST_TARGETS.get(collection_name)
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection_name}")
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    
+    # The body is read as it arrives and written chunk by chunk, never held whole
+    started = time.perf_counter()
+    reports = []
+    records = parse_records(aiter_lines(request.stream()), fmt, target.model)
+    async for report, docs in ingest(db[collection_name], target, records, chunk_size):
+        reports.append(report)
+        await apply_ingest_side_effects(collection_name, docs)
+        logger.info(
+            f"Ingest {collection_name} chunk {report['chunk']}: {report['rows']} rows, "
+            f"{report['invalid']} invalid, {report['rows_per_second']} rows/s"
+        )
+    return {
+        "collection": collection_name,
+        "summary": summarize(reports, time.perf_counter() - started),
+        "chunks": reports,
+    }
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@api_router.post("/timeseries/companies")
+async def add_company_metrics(points: List[CompanyMetricPoint] = Body(..., max_length=MAX_TIMESERIES_POINTS)):
+    companies = await timeseries.add_company_points([p.model_dump() for p in points])
+    await collection_versions.record_write("company_metrics")
+    return {"inserted": len(points), "companies": companies}
+
+@api_router.get("/timeseries/companies/{company_name}", dependencies=[Depends(etags.dependency("company_metrics"))])
+async def get_company_metrics(
+    company_name: str,
+    interval: str = Query("quarter", pattern="^(quarter|year)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    try:
+        parse_period(start)
+        parse_period(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await timeseries.company_series(company_name, interval, start, end)
+
+@api_router.post("/timeseries/trends")
+async def add_trend_points(points: List[TrendPoint] = Body(..., max_length=MAX_TIMESERIES_POINTS)):
+    technologies = await timeseries.add_trend_points([p.model_dump() for p in points])
+    await collection_versions.record_write("trend_points")
+    return {"inserted": len(points), "technologies": technologies}
+
+@api_router.get("/timeseries/trends", dependencies=[Depends(etags.dependency("trend_points"))])
+async def get_trend_points(
+    technology: Optional[str] = None,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+):
+    return await timeseries.trend_series(technology, start_year, end_year)
 
+@api_router.post("/analytics/benchmark")
+async def benchmark_companies(request: BenchmarkRequest):
+    await benchmark_engine.refresh(db.companies, collection_versions.get("companies"))
+    try:
+        result = benchmark_engine.benchmark(request.companies, request.weights, request.top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(content=result)
+
+@api_router.websocket("/ws/changes")
+async def stream_changes(websocket: WebSocket, topics: Optional[str] = None):
+    await websocket.accept()
+    subscriber = change_feed.subscribe(parse_topics(topics))
+    subscriber.offer({"type": "subscribed", "topics": sorted(subscriber.topics), "mode": change_feed.mode})
+    
+    async def receive_commands():
+        # {"subscribe": ["news"], "unsubscribe": ["trends"]}
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+            except ValueError:
+                command = None
+            if not isinstance(command, dict):
+                subscriber.offer({"type": "error", "detail": "Commands must be JSON objects"})
+                continue
+            change_feed.update(
+                subscriber,
+                add=parse_topics(command.get("subscribe")),
+                remove=parse_topics(command.get("unsubscribe")),
+            )
+            subscriber.offer({"type": "subscribed", "topics": sorted(subscriber.topics), "mode": change_feed.mode})
+    
+    async def send_changes():
+        # Single writer: acknowledgements go through the same queue as changes
+        while True:
+            await websocket.send_text(fast_dumps(await subscriber.next()).decode("utf-8"))
+    
+    tasks = [asyncio.ensure_future(receive_commands()), asyncio.ensure_future(send_changes())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        change_feed.unsubscribe(subscriber)
+
+# Include the router in the main app
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -597,11 +1293,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
+async def startup():
+    await database.connect()
+    collection_versions.start()
     await initialize_mock_data()
     logger.info("Database initialized with mock data")
+    await ensure_timeseries_collections(db)
+    await ensure_indexes(db)
+    await swot_cache.ensure_indexes()
+    await job_queue.ensure_indexes()
+    if VERIFY_QUERY_PLANS:
+        await verify_query_plans(db, HOT_QUERIES)
+    await leaderboards.refresh(db.companies, force=True)
+    # SWOT prompts are token-budgeted; the first load may download the encoding
+    await load_encoding()
+    news_search.start(db.news)
+    change_feed.start()
+    job_workers.start()
+
+async def shutdown():
+    # Running jobs go back to the queue while the database is still reachable
+    await job_workers.stop()
+    await change_feed.stop()
+    await news_search.stop()
+    await collection_versions.stop()
+    database.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+# Create the main app without a prefix
+app = FastAPI(lifespan=lifespan)
+
+app.include_router(api_router)
+
+# Prometheus scrape target; values read at scrape time sit next to the event-driven ones
+REGISTRY.register(Gauge(
+    "mongodb_pool_connections", "Pooled MongoDB connections by state.",
+    lambda: {
+        ("open",): database.pool_metrics.connections_open,
+        ("checked_out",): database.pool_metrics.checked_out,
+    },
+    ["state"],
+))
+REGISTRY.register(Gauge("swot_llm_inflight", "SWOT generations currently in flight.", swot_flight.inflight))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Added last so it is outermost and times the whole stack
+app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,83 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from snapshots import VersionedMatrix
+
+NUMERIC_FEATURES = (
+    "ai_adoption",
+    "cloud_adoption",
+    "cybersecurity_adoption",
+    "analytics_adoption",
+    "innovation_score",
+    "execution_score",
+    "consulting_mix",
+    "tech_services_mix",
+    "yoy_growth",
+)
+HASHED_FEATURES = ("key_services", "major_clients")
+
+
+@lru_cache(maxsize=65536)
+def hash_bucket(token: str, dims: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    # Signed hashing keeps collisions from only ever adding similarity
+    return value % dims, 1.0 if value >> 63 else -1.0
+
+
+class SimilarityIndex(VersionedMatrix):
+    """Unit-normalized capability vectors for nearest-competitor lookups by cosine similarity.
+
+    Each vector is the company's standardized numeric scores followed by a signed
+    feature-hashed bag of its key services and major clients.
+    """
+
+    fields = NUMERIC_FEATURES + HASHED_FEATURES
+
+    def __init__(self, hash_dims: int = 64, text_weight: float = 0.5, max_age_seconds: float = 60.0):
+        super().__init__(max_age_seconds)
+        self.hash_dims = hash_dims
+        self.text_weight = text_weight
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.vectors = np.empty((0, len(NUMERIC_FEATURES) + hash_dims), dtype=np.float32)
+
+    def hashed_block(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        block = np.zeros((len(rows), self.hash_dims), dtype=np.float32)
+        for i, row in enumerate(rows):
+            for field in HASHED_FEATURES:
+                for item in row.get(field) or []:
+                    bucket, sign = hash_bucket(f"{field}:{item.strip().lower()}", self.hash_dims)
+                    block[i, bucket] += sign
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        return np.divide(block, norms, out=np.zeros_like(block), where=norms > 0)
+
+    def load(self, rows: List[Dict[str, Any]]):
+        self.names = [row["name"] for row in rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        numeric = np.array([[row[f] for f in NUMERIC_FEATURES] for row in rows], dtype=np.float32)
+        numeric = numeric.reshape(-1, len(NUMERIC_FEATURES))
+        if len(rows):
+            std = numeric.std(axis=0)
+            numeric = np.where(std > 0, (numeric - numeric.mean(axis=0)) / np.where(std > 0, std, 1), 0)
+        # Scale the unit-length text block to sit alongside the numeric block's typical norm
+        text = self.hashed_block(rows) * (self.text_weight * np.sqrt(len(NUMERIC_FEATURES)))
+        vectors = np.hstack([numeric, text]).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    def similar(self, name: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        i = self.index.get(name)
+        if i is None:
+            return None
+        scores = self.vectors @ self.vectors[i]
+        scores[i] = -np.inf
+        k = min(k, len(self.names) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [{"name": self.names[j], "similarity": round(float(scores[j]), 4)} for j in top]
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastjson import dumps
+from metrics import record_cache_lookup
+from versions import CollectionVersions
+
+
+class VersionedSnapshot:
+    """Pre-serialized JSON built from several collections, rebuilt only when one of them changes.
+
+    Versions follow other workers' writes once the change feed or the shared version refresh
+    reports them; ``max_age_seconds`` bounds staleness from writes made outside the app.
+    """
+
+    def __init__(self, versions: CollectionVersions, collections: List[str],
+                 build: Callable[[], Awaitable[Dict[str, Any]]], max_age_seconds: float = 60.0,
+                 name: str = "snapshot"):
+        self.versions = versions
+        self.collections = collections
+        self.build = build
+        self.max_age_seconds = max_age_seconds
+        self.name = name
+        self._body: Optional[bytes] = None
+        self._built_for: Optional[Tuple[Any, ...]] = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def current_version(self) -> Tuple[Any, ...]:
+        return tuple(self.versions.get(name) for name in self.collections)
+
+    def is_fresh(self) -> bool:
+        return (
+            self._body is not None
+            and self._built_for == self.current_version()
+            and time.monotonic() - self._built_at < self.max_age_seconds
+        )
+
+    async def get(self) -> bytes:
+        if self.is_fresh():
+            record_cache_lookup(self.name, True)
+            return self._body
+        async with self._lock:
+            # Whoever held the lock may already have rebuilt it
+            if self.is_fresh():
+                record_cache_lookup(self.name, True)
+                return self._body
+            record_cache_lookup(self.name, False)
+            version = self.current_version()
+            payload = await self.build()
+            self._body = dumps(payload)
+            self._built_for = version
+            self._built_at = time.monotonic()
+            return self._body
+
+    def invalidate(self):
+        self._built_for = None
+
+
+class VersionedMatrix:
+    """Base for in-memory matrices or columns over a whole collection, rebuilt when its version moves.
+
+    Subclasses name the ``fields`` they read and the ``key`` fields identifying a row, and build
+    their arrays in ``load``. After a version change only rows whose ``updated_at`` (stamped by
+    ingest) reached the watermark are read and merged into the held rows before rebuilding. A full
+    read every ``max_age_seconds`` also catches deletes and writes that bypass ingest.
+    """
+
+    fields: Tuple[str, ...] = ()
+    key: Tuple[str, ...] = ("name",)
+
+    def __init__(self, max_age_seconds: float = 60.0):
+        self.max_age_seconds = max_age_seconds
+        self._rows: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._watermark: Optional[datetime] = None
+        self._version: Optional[Any] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def load(self, rows: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def is_fresh(self, version: Any) -> bool:
+        return self._version == version and time.monotonic() - self._loaded_at < self.max_age_seconds
+
+    async def refresh(self, collection, version: Any):
+        if self.is_fresh(version):
+            return
+        async with self._lock:
+            if self.is_fresh(version):
+                return
+            projection = {field: 1 for field in self.fields + self.key + ("updated_at",)}
+            projection["_id"] = 0
+            if time.monotonic() - self._loaded_at >= self.max_age_seconds:
+                rows = await collection.find({}, projection).to_list(None)
+                self._rows = {}
+                self._loaded_at = time.monotonic()
+            else:
+                query = {"updated_at": {"$gte": self._watermark}} if self._watermark else {"updated_at": {"$exists": True}}
+                rows = await collection.find(query, projection).to_list(None)
+            for row in rows:
+                self._rows[tuple(row.get(field) for field in self.key)] = row
+                updated_at = row.get("updated_at")
+                if updated_at and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            self.load(list(self._rows.values()))
+            self._version = version
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from indexes import ensure_ttl_index
+from metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+class SwotCache:
+    """Two-tier SWOT cache: an in-process LRU in front of a Mongo collection with a TTL index."""
+
+    def __init__(self, collection, max_entries: int = 512, ttl_seconds: int = 86400):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model: str, context: str) -> str:
+        return hashlib.sha256(f"{model}\n{context}".encode("utf-8")).hexdigest()
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index("key", unique=True)
+            await self.collection.create_index("company_name")
+        except PyMongoError as e:
+            # Lookups still work without them, only slower
+            logger.error(f"Failed to create SWOT cache indexes: {str(e)}")
+        await ensure_ttl_index(self.collection, "created_at", self.ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                record_cache_lookup("swot_memory", True)
+                return value
+            del self._entries[key]
+        record_cache_lookup("swot_memory", False)
+
+        try:
+            doc = await self.collection.find_one({"key": key}, {"_id": 0})
+        except Exception as e:
+            logger.warning(f"SWOT cache lookup failed: {str(e)}")
+            return None
+        if not doc:
+            record_cache_lookup("swot_mongo", False)
+            return None
+        # Mongo's TTL monitor only runs once a minute, so check age here as well
+        created_at = doc["created_at"]
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        age = (datetime.now(timezone.utc) - created_at).total_seconds()
+        if age >= self.ttl_seconds:
+            record_cache_lookup("swot_mongo", False)
+            return None
+        record_cache_lookup("swot_mongo", True)
+        self._remember(key, doc["company_name"], doc["swot"], self.ttl_seconds - age)
+        return doc["swot"]
+
+    async def set(self, key: str, company_name: str, value: Dict[str, Any]):
+        self._remember(key, company_name, value, self.ttl_seconds)
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "company_name": company_name,
+                    "swot": value,
+                    "created_at": datetime.now(timezone.utc),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"SWOT cache write failed: {str(e)}")
+
+    async def invalidate(self, company_name: Optional[str] = None):
+        if company_name is None:
+            self._entries.clear()
+            await self.collection.delete_many({})
+            return
+        for key in [k for k, (_, name, _) in self._entries.items() if name == company_name]:
+            del self._entries[key]
+        await self.collection.delete_many({"company_name": company_name})
+
+    async def invalidate_companies(self, company_names: Iterable[str]):
+        names = set(company_names)
+        if not names:
+            return
+        for key in [k for k, (_, name, _) in self._entries.items() if name in names]:
+            del self._entries[key]
+        await self.collection.delete_many({"company_name": {"$in": list(names)}})
+
+    def _remember(self, key: str, company_name: str, value: Dict[str, Any], ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, company_name, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
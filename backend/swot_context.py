@@ -0,0 +1,99 @@
+import math
+import re
+from datetime import date
+from typing import Any, Dict, List, Set, Tuple
+
+from tokenizer import count_tokens, truncate_tokens
+
+IMPACT_WEIGHTS = {"High": 3.0, "Medium": 2.0, "Low": 1.0}
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def company_header(company: Dict[str, Any]) -> str:
+    return f"""
+Company: {company['name']}
+Revenue: ${company['revenue']}B
+YoY Growth: {company['yoy_growth']}%
+Market Share: {company['market_share']}%
+Key Services: {', '.join(company['key_services'])}
+AI Adoption Score: {company['ai_adoption']}/10
+Cloud Adoption Score: {company['cloud_adoption']}/10
+Innovation Score: {company['innovation_score']}/10
+Execution Score: {company['execution_score']}/10
+
+Recent News:
+"""
+
+
+def _day_number(value: str) -> int:
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def _words(title: str) -> Set[str]:
+    return set(WORD.findall(title.lower()))
+
+
+class SwotContextBuilder:
+    """Builds the SWOT prompt context from a company and its candidate news within a token budget.
+
+    News is ranked by impact weight times an exponential recency decay. The decay ratio between
+    two items never changes as time passes, so the same candidates always yield the same
+    context and the SWOT cache key stays stable. Headlines too similar to a kept one are skipped.
+    """
+
+    def __init__(self, token_budget: int = 1200, half_life_days: float = 90.0,
+                 duplicate_threshold: float = 0.6, max_item_tokens: int = 80):
+        self.token_budget = token_budget
+        self.half_life_days = half_life_days
+        self.duplicate_threshold = duplicate_threshold
+        self.max_item_tokens = max_item_tokens
+
+    def rank(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        def score(item: Dict[str, Any]) -> Tuple[float, str, str]:
+            # log(weight) - age * ln2 / half_life orders the same as weight * 0.5 ** (age / half_life)
+            weight = IMPACT_WEIGHTS.get(item.get("impact"), 1.0)
+            recency = _day_number(item.get("date", "")) * math.log(2) / self.half_life_days
+            return (math.log(weight) + recency, item.get("date", ""), item.get("id", ""))
+
+        return sorted(news_items, key=score, reverse=True)
+
+    def dedupe(self, ranked: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        kept_words: List[Set[str]] = []
+        for item in ranked:
+            words = _words(item["title"])
+            if any(len(words & other) / (len(words | other) or 1) >= self.duplicate_threshold for other in kept_words):
+                continue
+            kept.append(item)
+            kept_words.append(words)
+        return kept
+
+    def news_line(self, item: Dict[str, Any]) -> str:
+        line = f"- [{item.get('impact', 'Unknown')}] {item.get('date', '')} {item['title']}: {item['description']}"
+        return truncate_tokens(line, self.max_item_tokens) + "\n"
+
+    def build(self, company: Dict[str, Any], news_items: List[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+        header = company_header(company)
+        used = count_tokens(header)
+        selected = []
+        candidates = self.dedupe(self.rank(news_items))
+        for item in candidates:
+            line = self.news_line(item)
+            cost = count_tokens(line)
+            if used + cost > self.token_budget:
+                continue
+            selected.append((item, line))
+            used += cost
+
+        # Chronological order reads better than score order once the selection is made
+        selected.sort(key=lambda pair: (pair[0].get("date", ""), pair[0].get("id", "")), reverse=True)
+        stats = {
+            "tokens": used,
+            "news_candidates": len(news_items),
+            "news_duplicates": len(news_items) - len(candidates),
+            "news_used": len(selected),
+        }
+        return header + "".join(line for _, line in selected), stats
@@ -0,0 +1,205 @@
+import ast
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+QUADRANTS = ("strengths", "weaknesses", "opportunities", "threats")
+HEADING = re.compile(r"^\W*(strengths|weaknesses|opportunities|threats)\W*$", re.IGNORECASE)
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)")
+
+
+class SwotParseError(ValueError):
+    """The LLM output contained no recognizable SWOT quadrant."""
+
+
+def _decode(raw: str, quote: str = '"') -> str:
+    try:
+        if quote == "'":
+            # Python-style literal, as printed by models that echo a dict
+            return ast.literal_eval(f"'{raw}'")
+        # strict=False tolerates raw newlines and tabs inside strings
+        return json.loads(f'"{raw}"', strict=False)
+    except (ValueError, SyntaxError):
+        return raw
+
+
+class SwotStreamParser:
+    """Pulls SWOT quadrants out of LLM output as it arrives, one character at a time.
+
+    Rather than parsing a JSON document, it watches for a quadrant key followed by an
+    array and collects the array's strings. Fences, prose around the object, trailing
+    commas, single-quoted strings and truncation therefore cost nothing: whatever was
+    complete is kept. A single quote only opens a string where a value is expected, so
+    apostrophes inside double-quoted text are safe; an apostrophe inside a single-quoted
+    string still ends it early. Items that are objects become their string values joined. ``complete`` tells after
+    ``close`` whether every quadrant arrived whole or the output had to be salvaged.
+    """
+
+    def __init__(self):
+        self.quadrants: Dict[str, List[str]] = {}
+        self._depth = 0
+        self._in_string = False
+        self._quote = '"'
+        self._escape = False
+        # Right after "{", "[", "," or ":", where a single quote can only open a string
+        self._expect_value = False
+        self._raw: List[str] = []
+        self._last_string: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._items: List[str] = []
+        self._object_values: Optional[List[Tuple[str, bool]]] = None
+        self._text: List[str] = []
+        self._finished: Set[str] = set()
+        self.complete = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, List[str]]]:
+        self._text.append(chunk)
+        completed = []
+        for ch in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._in_string = False
+                    self._on_string(_decode("".join(self._raw), self._quote))
+                    self._raw = []
+                    continue
+                self._raw.append(ch)
+                continue
+
+            # Prose before the first brace may hold stray quotes, so nothing counts until then
+            if self._depth == 0 and ch != "{":
+                continue
+            if not ch.isspace():
+                expect_value, self._expect_value = self._expect_value, ch in "{[,:"
+            if ch == '"' or (ch == "'" and expect_value):
+                self._in_string = True
+                self._quote = ch
+            elif ch == ":":
+                self._on_colon()
+            elif ch in "{[":
+                self._depth += 1
+                self._on_open(ch)
+            elif ch in "}]":
+                done = self._on_close(ch)
+                if done:
+                    completed.append(done)
+                self._depth -= 1
+            elif not ch.isspace():
+                self._last_string = None
+                if self._array_depth is None:
+                    self._pending = None
+        return completed
+
+    def close(self) -> Dict[str, List[str]]:
+        # A truncated array still yields the items that were complete
+        if self._array_depth is not None and self._items:
+            self._emit(finished=False)
+        if not self.quadrants:
+            self.quadrants = parse_markdown("".join(self._text))
+            # Markdown has no closing delimiter, so a cut-off last list cannot be told apart
+            self._finished = set(self.quadrants)
+        if not self.quadrants:
+            raise SwotParseError("No SWOT quadrants found in LLM output")
+        self.complete = all(name in self._finished and self.quadrants[name] for name in QUADRANTS)
+        return {name: self.quadrants.get(name, []) for name in QUADRANTS}
+
+    def _on_string(self, value: str):
+        if self._array_depth is not None:
+            if self._depth == self._array_depth:
+                self._items.append(value)
+            elif self._object_values is not None:
+                self._object_values.append((value, False))
+                self._last_string = value
+            return
+        if self._pending is not None:
+            # A quadrant given as one string rather than a list
+            self._items = [value]
+            self._emit()
+            return
+        self._last_string = value
+
+    def _on_colon(self):
+        if self._object_values:
+            text, _ = self._object_values[-1]
+            self._object_values[-1] = (text, True)
+        elif self._array_depth is None and self._last_string is not None:
+            key = self._last_string.strip().lower()
+            if key in QUADRANTS and key not in self.quadrants:
+                self._pending = key
+        self._last_string = None
+
+    def _on_open(self, ch: str):
+        self._last_string = None
+        if ch == "[" and self._pending is not None and self._array_depth is None:
+            self._array_depth = self._depth
+            self._items = []
+        elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+            self._object_values = []
+        elif self._array_depth is None:
+            self._pending = None
+
+    def _on_close(self, ch: str) -> Optional[Tuple[str, List[str]]]:
+        self._last_string = None
+        if self._array_depth is None:
+            return None
+        if ch == "}" and self._object_values is not None and self._depth == self._array_depth + 1:
+            values = [text for text, is_key in self._object_values if not is_key and text.strip()]
+            if values:
+                self._items.append(" - ".join(values))
+            self._object_values = None
+        elif ch == "]" and self._depth == self._array_depth:
+            return self._emit()
+        return None
+
+    def _emit(self, finished: bool = True) -> Tuple[str, List[str]]:
+        name = self._pending
+        items = [item.strip() for item in self._items if item.strip()]
+        self.quadrants[name] = items
+        if finished:
+            self._finished.add(name)
+        self._pending = None
+        self._array_depth = None
+        self._items = []
+        self._object_values = None
+        return name, items
+
+
+def parse_markdown(text: str) -> Dict[str, List[str]]:
+    # Last resort for models that ignored the JSON instruction and wrote headed bullet lists
+    quadrants: Dict[str, List[str]] = {}
+    current = None
+    for line in text.splitlines():
+        heading = HEADING.match(line.strip())
+        if heading:
+            current = heading.group(1).lower()
+            quadrants.setdefault(current, [])
+            continue
+        bullet = BULLET.match(line)
+        if current is not None and bullet:
+            quadrants[current].append(bullet.group(1).strip("*_ "))
+    return {name: items for name, items in quadrants.items() if items}
+
+
+def parse_swot(text: str) -> Tuple[Dict[str, List[str]], bool]:
+    parser = SwotStreamParser()
+    parser.feed(text)
+    quadrants = parser.close()
+    return quadrants, parser.complete
+
+
+async def iter_quadrants(chunks: AsyncIterator[str],
+                         parser: Optional[SwotStreamParser] = None) -> AsyncIterator[Tuple[str, List[str]]]:
+    # Pass a parser to read its ``complete`` flag once the stream is exhausted
+    parser = parser or SwotStreamParser()
+    async for chunk in chunks:
+        for quadrant in parser.feed(chunk):
+            yield quadrant
+    streamed = set(parser.quadrants)
+    # Quadrants recovered only at close (truncated arrays, markdown) come last
+    for name, items in parser.close().items():
+        if items and name not in streamed:
+            yield name, items
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Raw points land in time-series collections; reads are served from the rollup collections
+COMPANY_POINTS = "company_metrics"
+TREND_POINTS = "trend_points"
+COMPANY_ROLLUPS = "company_metric_rollups"
+TREND_ROLLUPS = "trend_rollups"
+# Unique key of each rollup collection, matching its index
+ROLLUP_KEYS = {
+    COMPANY_ROLLUPS: ("company_name", "interval", "period_index"),
+    TREND_ROLLUPS: ("technology", "year"),
+}
+
+TTM_QUARTERS = 4
+TREND_CAGR_YEARS = 3
+
+# Points are quarterly or yearly, so a preset granularity ("hours" spans 30 days) stores one
+# point per bucket. Custom bucketing (MongoDB 6.3+) spans up to a year, the most allowed,
+# which fits four quarters of a series; older servers get the coarsest preset.
+YEAR_SECONDS = 365 * 24 * 3600
+BUCKETINGS = (
+    {"bucketMaxSpanSeconds": YEAR_SECONDS, "bucketRoundingSeconds": YEAR_SECONDS},
+    {"granularity": "hours"},
+)
+
+
+def quarter_start(year: int, quarter: int) -> datetime:
+    return datetime(year, 3 * (quarter - 1) + 1, 1, tzinfo=timezone.utc)
+
+
+def parse_period(period: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """Parse ``2024`` or ``2024-Q3`` into ``(year, quarter)``; quarter is None for a bare year."""
+    if not period:
+        return None
+    year, _, quarter = period.upper().partition("-Q")
+    if not year.isdigit() or (quarter and quarter not in ("1", "2", "3", "4")):
+        raise ValueError(f"Invalid period: {period}")
+    return int(year), int(quarter) if quarter else None
+
+
+async def ensure_collections(db):
+    specs = [
+        (COMPANY_POINTS, {"timeField": "ts", "metaField": "company_name"}),
+        (TREND_POINTS, {"timeField": "ts", "metaField": "technology"}),
+    ]
+    # Existing collections keep the bucketing they were created with
+    existing = set(await db.list_collection_names())
+    for name, timeseries in specs:
+        if name in existing:
+            continue
+        error: Optional[Exception] = None
+        for bucketing in BUCKETINGS:
+            try:
+                await db.create_collection(name, timeseries={**timeseries, **bucketing})
+                error = None
+                break
+            except CollectionInvalid:
+                error = None
+                break
+            except (OperationFailure, NotImplementedError) as e:
+                error = e
+        if error is not None:
+            # Pre-5.0 servers and in-memory stand-ins: keep a plain collection indexed the same way
+            logger.warning(f"Time-series collections unavailable, using a regular {name} collection: {str(error)}")
+            await db[name].create_index([(timeseries["metaField"], 1), ("ts", 1)])
+
+
+def latest_by_period(points: Iterable[Dict[str, Any]], key) -> List[Dict[str, Any]]:
+    # Raw collections are append-only; the most recently ingested point for a period wins
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for point in sorted(points, key=lambda p: p["ingested_at"]):
+        latest[key(point)] = point
+    return [latest[k] for k in sorted(latest)]
+
+
+def company_rollups(company_name: str, points: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    quarters = latest_by_period(points, key=lambda p: (p["year"], p["quarter"]))
+    docs = []
+    for i, point in enumerate(quarters):
+        window = quarters[max(0, i - TTM_QUARTERS + 1):i + 1]
+        docs.append({
+            "company_name": company_name,
+            "interval": "quarter",
+            "period": f"{point['year']}-Q{point['quarter']}",
+            "period_index": point["year"] * 4 + point["quarter"] - 1,
+            "year": point["year"],
+            "quarter": point["quarter"],
+            "revenue": point["revenue"],
+            "yoy_growth": point["yoy_growth"],
+            "market_share": point["market_share"],
+            # Trailing windows are only reported once they are complete
+            "revenue_ttm": round(sum(p["revenue"] for p in window), 6) if len(window) == TTM_QUARTERS else None,
+            "yoy_growth_avg_4q": (
+                round(sum(p["yoy_growth"] for p in window) / TTM_QUARTERS, 6) if len(window) == TTM_QUARTERS else None
+            ),
+        })
+
+    by_year: Dict[int, List[Dict[str, Any]]] = {}
+    for point in quarters:
+        by_year.setdefault(point["year"], []).append(point)
+    for year, year_points in sorted(by_year.items()):
+        n = len(year_points)
+        docs.append({
+            "company_name": company_name,
+            "interval": "year",
+            "period": str(year),
+            "period_index": year,
+            "year": year,
+            "quarter": None,
+            # A year still in progress sums only its reported quarters; charts flag it
+            "quarters": n,
+            "complete": n == 4,
+            "revenue": round(sum(p["revenue"] for p in year_points), 6),
+            "yoy_growth": round(sum(p["yoy_growth"] for p in year_points) / n, 6),
+            "market_share": round(sum(p["market_share"] for p in year_points) / n, 6),
+        })
+    return docs
+
+
+def trend_rollups(technology: str, points: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    years = latest_by_period(points, key=lambda p: p["year"])
+    by_year = {p["year"]: p for p in years}
+    docs = []
+    for point in years:
+        earlier = by_year.get(point["year"] - TREND_CAGR_YEARS)
+        cagr = None
+        if earlier and earlier["market_size"] > 0:
+            cagr = round(((point["market_size"] / earlier["market_size"]) ** (1 / TREND_CAGR_YEARS) - 1) * 100, 6)
+        docs.append({
+            "technology": technology,
+            "year": point["year"],
+            "adoption_rate": point["adoption_rate"],
+            "growth_rate": point["growth_rate"],
+            "market_size": point["market_size"],
+            "market_size_cagr_3y": cagr,
+        })
+    return docs
+
+
+class TimeSeriesStore:
+    def __init__(self, db):
+        self.db = db
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def _series_lock(self, collection_name: str, series: str) -> asyncio.Lock:
+        # Recomputing a series reads all of its raw points; the last reader must write last
+        return self._locks.setdefault((collection_name, series), asyncio.Lock())
+
+    async def add_company_points(self, points: List[Dict[str, Any]]) -> List[str]:
+        now = datetime.now(timezone.utc)
+        docs = [{**p, "ts": quarter_start(p["year"], p["quarter"]), "ingested_at": now} for p in points]
+        await self.db[COMPANY_POINTS].insert_many(docs)
+        companies = sorted({p["company_name"] for p in points})
+        for company_name in companies:
+            async with self._series_lock(COMPANY_ROLLUPS, company_name):
+                raw = await self.db[COMPANY_POINTS].find({"company_name": company_name}, {"_id": 0}).to_list(None)
+                await self._write_rollups(COMPANY_ROLLUPS, {"company_name": company_name}, company_rollups(company_name, raw))
+        return companies
+
+    async def add_trend_points(self, points: List[Dict[str, Any]]) -> List[str]:
+        now = datetime.now(timezone.utc)
+        docs = [{**p, "ts": datetime(p["year"], 1, 1, tzinfo=timezone.utc), "ingested_at": now} for p in points]
+        await self.db[TREND_POINTS].insert_many(docs)
+        technologies = sorted({p["technology"] for p in points})
+        for technology in technologies:
+            async with self._series_lock(TREND_ROLLUPS, technology):
+                raw = await self.db[TREND_POINTS].find({"technology": technology}, {"_id": 0}).to_list(None)
+                await self._write_rollups(TREND_ROLLUPS, {"technology": technology}, trend_rollups(technology, raw))
+        return technologies
+
+    async def company_series(self, company_name: str, interval: str,
+                             start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"company_name": company_name, "interval": interval}
+        bounds = {}
+        for op, period, edge in (("$gte", start, 1), ("$lte", end, 4)):
+            parsed = parse_period(period)
+            if parsed:
+                year, quarter = parsed
+                # A bare year covers Q1..Q4 when the series is quarterly
+                bounds[op] = year if interval == "year" else year * 4 + (quarter or edge) - 1
+        if bounds:
+            query["period_index"] = bounds
+        return await self.db[COMPANY_ROLLUPS].find(query, {"_id": 0}).sort("period_index", 1).to_list(None)
+
+    async def trend_series(self, technology: Optional[str] = None,
+                           start_year: Optional[int] = None, end_year: Optional[int] = None) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if technology:
+            query["technology"] = technology
+        years = {}
+        if start_year is not None:
+            years["$gte"] = start_year
+        if end_year is not None:
+            years["$lte"] = end_year
+        if years:
+            query["year"] = years
+        cursor = self.db[TREND_ROLLUPS].find(query, {"_id": 0}).sort([("technology", 1), ("year", 1)])
+        return await cursor.to_list(None)
+
+    async def _write_rollups(self, collection_name: str, scope: Dict[str, Any], docs: List[Dict[str, Any]]):
+        # Upserts on the unique key keep every period readable throughout and let
+        # concurrent writers from other processes overlap without duplicate key errors
+        collection = self.db[collection_name]
+        keys = [{field: doc[field] for field in ROLLUP_KEYS[collection_name]} for doc in docs]
+        if docs:
+            await collection.bulk_write([ReplaceOne(key, doc, upsert=True) for key, doc in zip(keys, docs)], ordered=False)
+        # Only periods that no longer have any points go
+        await collection.delete_many({**scope, "$nor": keys} if keys else scope)
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_ENCODING = os.environ.get('TOKENIZER_ENCODING', 'o200k_base')
+
+_loaded_encoding: Optional[Any] = None
+
+
+def _load():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        # tiktoken fetches its BPE ranks on first use; offline hosts fall back to an estimate
+        logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+async def load_encoding():
+    """Loads the encoding in a worker thread, since the first load may download it.
+
+    Until it has loaded, token counts are estimated from character counts.
+    """
+    global _loaded_encoding
+    if _loaded_encoding is None:
+        _loaded_encoding = await asyncio.to_thread(_load)
+
+
+def _encoding():
+    return _loaded_encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        # ~4 characters per token for English prose
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    encoding = _encoding()
+    if encoding is None:
+        limit = max_tokens * 4
+        return text if len(text) <= limit else text[:limit].rstrip() + "…"
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]).rstrip() + "…"
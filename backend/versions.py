@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVersions:
+    """Per-collection write counters kept in Mongo, so every worker can see every write.
+
+    Each counter carries an epoch drawn when its document is first created, so counters that
+    start over after the collection is dropped never repeat an earlier version.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def bump(self, collection_name: str) -> Dict[str, Any]:
+        return await self.collection.find_one_and_update(
+            {"_id": collection_name},
+            {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def load(self) -> List[Dict[str, Any]]:
+        return await self.collection.find({}).to_list(None)
+
+
+class CollectionVersions:
+    """Per-collection versions; anything that mutates a collection bumps its version.
+
+    ETags and the in-process caches both key on ``get``, so a tag always names the data those
+    caches serve, and answering it never touches Mongo. Without a ``shared`` store versions are
+    per-process counters. With one, writes are counted in Mongo and ``get`` reads an in-memory
+    copy of those counters: this worker's writes update it at once, and other workers' writes
+    arrive through ``note_change`` (the change feed) or the refresh every ``refresh_seconds``.
+    """
+
+    def __init__(self, shared: Optional[SharedVersions] = None, refresh_seconds: float = 5.0):
+        self.shared = shared
+        self.refresh_seconds = refresh_seconds
+        self.boot_id = uuid.uuid4().hex
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._shared: Dict[str, Tuple[str, int]] = {}
+        # Written here while the shared counter could not be bumped
+        self._unshared: Set[str] = set()
+        self._listeners: List[Callable[[str], None]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, collection_name: str) -> Any:
+        if self.shared is None:
+            return self._versions[collection_name]
+        epoch, version = self._shared.get(collection_name, ("", 0))
+        if collection_name in self._unshared:
+            # Never hand out the tag from before a write that only this process knows about
+            return f"{epoch}:{version}+{self.boot_id}:{self._versions[collection_name]}"
+        return f"{epoch}:{version}"
+
+    def bump(self, *collection_names: str):
+        for name in collection_names:
+            self._versions[name] += 1
+            self._notify(name)
+
+    async def record_write(self, *collection_names: str):
+        for name in collection_names:
+            self._versions[name] += 1
+            if self.shared is not None:
+                try:
+                    doc = await self.shared.bump(name)
+                    self._merge(name, doc["epoch"], doc["version"])
+                except PyMongoError as e:
+                    logger.warning(f"Could not record shared version for {name}: {str(e)}")
+                    self._unshared.add(name)
+            self._notify(name)
+
+    def note_change(self, collection_name: str):
+        # A write seen on the change feed, possibly made by another worker
+        if self.shared is None:
+            self.bump(collection_name)
+        else:
+            self._wake.set()
+
+    async def refresh(self):
+        for doc in await self.shared.load():
+            if self._merge(doc["_id"], doc["epoch"], doc["version"]):
+                self._notify(doc["_id"])
+
+    def start(self):
+        if self.shared is not None and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def subscribe(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+
+    def _merge(self, name: str, epoch: str, version: int) -> bool:
+        current = self._shared.get(name)
+        # A load that started before one of our own bumps must not roll the version back
+        if current is not None and current[0] == epoch and current[1] >= version:
+            return False
+        self._shared[name] = (epoch, version)
+        self._unshared.discard(name)
+        return True
+
+    def _notify(self, name: str):
+        for listener in self._listeners:
+            listener(name)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except PyMongoError as e:
+                logger.warning(f"Could not refresh shared versions: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
@@ -1,7 +1,32 @@
+import { useState, useEffect } from "react";
+import axios from "axios";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
-import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell, BarChart, Bar, Legend } from "recharts";
+import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
+import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell, BarChart, Bar, Legend, LineChart, Line } from "recharts";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
 
 const FinancialAnalysis = ({ companies }) => {
+  const [historyCompany, setHistoryCompany] = useState(companies[0]?.name || "");
+  const [history, setHistory] = useState([]);
+
+  useEffect(() => {
+    if (!historyCompany) return;
+    // Yearly rollups are precomputed server-side, so decades of history stay small
+    axios
+      .get(`${API}/timeseries/companies/${encodeURIComponent(historyCompany)}`, { params: { interval: "year" } })
+      .then((response) => setHistory(response.data.map((row) => ({
+        ...row,
+        // A year in progress only sums its reported quarters; label it so it is not read as a full year
+        period: row.complete === false ? `${row.period} (${row.quarters}/4 Q)` : row.period,
+      }))))
+      .catch((error) => {
+        console.error("Error fetching revenue history:", error);
+        setHistory([]);
+      });
+  }, [historyCompany]);
+
   const positioningData = companies.map(c => ({
     name: c.name,
     innovation: c.innovation_score,
@@ -180,6 +205,51 @@ const FinancialAnalysis = ({ companies }) => {
         </CardContent>
       </Card>
 
+      {/* Revenue History */}
+      <Card className="bg-white border-slate-200">
+        <CardHeader>
+          <div className="flex flex-wrap items-center justify-between gap-4">
+            <CardTitle className="text-xl font-semibold">Revenue History</CardTitle>
+            <div className="min-w-[220px]">
+              <Select value={historyCompany} onValueChange={setHistoryCompany}>
+                <SelectTrigger data-testid="history-company-select">
+                  <SelectValue placeholder="Select a company" />
+                </SelectTrigger>
+                <SelectContent>
+                  {companies.map(company => (
+                    <SelectItem key={company.id} value={company.name}>{company.name}</SelectItem>
+                  ))}
+                </SelectContent>
+              </Select>
+            </div>
+          </div>
+        </CardHeader>
+        <CardContent>
+          {history.length > 0 ? (
+            <ResponsiveContainer width="100%" height={350}>
+              <LineChart data={history}>
+                <CartesianGrid strokeDasharray="3 3" stroke="#e2e8f0" />
+                <XAxis dataKey="period" stroke="#64748b" />
+                <YAxis stroke="#64748b" />
+                <Tooltip 
+                  contentStyle={{ background: '#fff', border: '1px solid #e2e8f0', borderRadius: '8px' }}
+                />
+                <Legend />
+                <Line type="monotone" dataKey="revenue" stroke="#3b82f6" name="Revenue ($B)" dot={false} />
+                <Line type="monotone" dataKey="yoy_growth" stroke="#10b981" name="Avg YoY Growth (%)" dot={false} />
+              </LineChart>
+            </ResponsiveContainer>
+          ) : (
+            <p className="text-sm text-slate-500" data-testid="history-empty">No historical metrics recorded for this company yet.</p>
+          )}
+          {history.some((row) => row.complete === false) && (
+            <p className="text-xs text-slate-500 mt-2" data-testid="history-partial-note">
+              Years marked with a quarter count are partial; revenue covers only the reported quarters.
+            </p>
+          )}
+        </CardContent>
+      </Card>
+
       {/* Financial Metrics Table */}
       <Card className="bg-white border-slate-200">
         <CardHeader>
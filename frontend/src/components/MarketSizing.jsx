@@ -4,10 +4,12 @@ import { TrendingUp, DollarSign, Target } from "lucide-react";
 
 const COLORS = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444'];
 
-const MarketSizing = ({ marketData }) => {
-  const totalTAM = marketData.reduce((sum, item) => sum + item.tam, 0);
-  const totalSAM = marketData.reduce((sum, item) => sum + item.sam, 0);
-  const totalSOM = marketData.reduce((sum, item) => sum + item.som, 0);
+const MarketSizing = ({ marketData, rollups }) => {
+  // Totals come from the server-side rollup; marketData may be a single page of rows
+  const total = rollups?.total ?? { tam: 0, sam: 0, som: 0 };
+  const totalTAM = total.tam;
+  const totalSAM = total.sam;
+  const totalSOM = total.som;
 
   return (
     <div className="space-y-6" data-testid="market-sizing">
@@ -3,10 +3,10 @@ import { Badge } from "@/components/ui/badge";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 import { Lightbulb, TrendingUp, Target, AlertCircle, CheckCircle, ArrowRight } from "lucide-react";
 
-const Recommendations = ({ companies, news, trends }) => {
-  // Analyze data for insights
-  const topPerformers = [...companies].sort((a, b) => b.yoy_growth - a.yoy_growth).slice(0, 3);
-  const innovationLeaders = [...companies].sort((a, b) => b.innovation_score - a.innovation_score).slice(0, 3);
+const Recommendations = ({ leaderboards, news, trends }) => {
+  // Analyze data for insights; company rankings are precomputed server-side
+  const topPerformers = leaderboards?.top.yoy_growth ?? [];
+  const innovationLeaders = leaderboards?.top.innovation_score ?? [];
   const highGrowthTechs = [...trends].sort((a, b) => b.growth_rate - a.growth_rate).slice(0, 3);
   const innovationNews = news.filter(n => n.category === "Innovation");
 
@@ -1,5 +1,4 @@
 import { useState } from "react";
-import axios from "axios";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Button } from "@/components/ui/button";
@@ -15,22 +14,38 @@ const SWOTAnalysis = ({ companies }) => {
   const [swotData, setSwotData] = useState(null);
   const [loading, setLoading] = useState(false);
 
-  const generateSWOT = async () => {
+  const generateSWOT = () => {
     if (!selectedCompany) return;
     
     setLoading(true);
-    try {
-      const response = await axios.post(`${API}/swot`, {
-        company_name: selectedCompany
-      });
-      setSwotData(response.data);
+    setSwotData(null);
+    const source = new EventSource(
+      `${API}/swot/stream?company_name=${encodeURIComponent(selectedCompany)}`
+    );
+    
+    source.addEventListener("meta", (event) => {
+      const { company_name } = JSON.parse(event.data);
+      setSwotData({ company_name, strengths: [], weaknesses: [], opportunities: [], threats: [] });
+    });
+    source.addEventListener("quadrant", (event) => {
+      const { name, items } = JSON.parse(event.data);
+      setSwotData((current) => ({ ...current, [name]: items }));
+    });
+    source.addEventListener("fallback", (event) => {
+      setSwotData(JSON.parse(event.data));
+    });
+    source.addEventListener("done", () => {
+      source.close();
+      setLoading(false);
       toast.success("SWOT analysis generated successfully!");
-    } catch (error) {
+    });
+    source.onerror = (error) => {
+      // EventSource reconnects by default; a SWOT stream is one-shot
+      source.close();
+      setLoading(false);
       console.error("Error generating SWOT:", error);
       toast.error("Failed to generate SWOT analysis");
-    } finally {
-      setLoading(false);
-    }
+    };
   };
 
   return (
@@ -13,31 +13,77 @@ import { Building2, TrendingUp } from "lucide-react";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// A bulk ingest sends one change per company; refetch leaderboards at most this often
+const LEADERBOARDS_REFRESH_MS = 1000;
+
+// Merge one change-feed message into a list keyed by document id
+const applyChange = (items, change) => {
+  const index = items.findIndex(item => item.id === change.id);
+  if (change.op === "update") {
+    if (index === -1) return items;
+    const next = [...items];
+    next[index] = { ...items[index], ...change.changes };
+    return next;
+  }
+  if (index === -1) return [change.doc, ...items];
+  const next = [...items];
+  next[index] = change.doc;
+  return next;
+};
 
 const Dashboard = () => {
   const [companies, setCompanies] = useState([]);
   const [news, setNews] = useState([]);
   const [trends, setTrends] = useState([]);
   const [marketData, setMarketData] = useState([]);
+  const [marketRollups, setMarketRollups] = useState(null);
+  const [leaderboards, setLeaderboards] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     fetchData();
   }, []);
 
+  useEffect(() => {
+    const socket = new WebSocket(`${API.replace(/^http/, "ws")}/ws/changes?topics=companies,news,trends`);
+    const setters = { companies: setCompanies, news: setNews, trends: setTrends };
+    let leaderboardsTimer = null;
+    const scheduleLeaderboards = () => {
+      if (leaderboardsTimer) return;
+      leaderboardsTimer = setTimeout(() => {
+        leaderboardsTimer = null;
+        axios.get(`${API}/leaderboards`).then(({ data }) => setLeaderboards(data)).catch(() => {});
+      }, LEADERBOARDS_REFRESH_MS);
+    };
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      // Deletes carry no document id and a resync means we fell behind: reload in full
+      if (message.type === "resync" || message.op === "delete") {
+        fetchData();
+        return;
+      }
+      if (message.type !== "change" || !setters[message.topic]) return;
+      setters[message.topic]((items) => applyChange(items, message));
+      if (message.topic === "companies") {
+        scheduleLeaderboards();
+      }
+    };
+    return () => {
+      clearTimeout(leaderboardsTimer);
+      socket.close();
+    };
+  }, []);
+
   const fetchData = async () => {
     try {
-      const [companiesRes, newsRes, trendsRes, marketRes] = await Promise.all([
-        axios.get(`${API}/companies`),
-        axios.get(`${API}/news`),
-        axios.get(`${API}/trends`),
-        axios.get(`${API}/market-sizing`)
-      ]);
+      const { data } = await axios.get(`${API}/dashboard`);
       
-      setCompanies(companiesRes.data);
-      setNews(newsRes.data);
-      setTrends(trendsRes.data);
-      setMarketData(marketRes.data);
+      setCompanies(data.companies);
+      setNews(data.news);
+      setTrends(data.trends);
+      setMarketData(data.market_sizing);
+      setMarketRollups(data.market_rollups);
+      setLeaderboards(data.leaderboards);
       setLoading(false);
     } catch (error) {
       console.error("Error fetching data:", error);
@@ -185,11 +231,11 @@ const Dashboard = () => {
           </TabsContent>
 
           <TabsContent value="market" data-testid="content-market">
-            <MarketSizing marketData={marketData} />
+            <MarketSizing marketData={marketData} rollups={marketRollups} />
           </TabsContent>
 
           <TabsContent value="recommendations" data-testid="content-recommendations">
-            <Recommendations companies={companies} news={news} trends={trends} />
+            <Recommendations leaderboards={leaderboards} news={news} trends={trends} />
           </TabsContent>
         </Tabs>
       </main>